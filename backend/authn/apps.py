@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AuthnConfig(AppConfig):
     name = 'authn'
+
+    def ready(self):
+        from . import signals  # noqa: F401
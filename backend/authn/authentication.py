@@ -0,0 +1,156 @@
+"""
+JWT authentication with a cached principal.
+
+Purpose:
+- Resolve the user behind an access token (and their profile) from a
+  short-lived cache instead of querying the database on every request
+- Fall back to one query (user + profile, joined) on a miss
+- Invalidate on any user or profile write (see authn.signals), e.g.
+  deactivation or ProfileView.put
+
+The cache holds field values, not model instances, and never the
+password hash: restored users have `password` deferred, so the rare
+code path that needs it loads it from the database.
+
+Limitation: the key is the user id alone, and invalidation relies on
+model signals. Writes that bypass them (QuerySet.update(), bulk admin
+actions, raw SQL) leave the cached principal (e.g. a deactivated user)
+valid for up to PRINCIPAL_TTL; such code must call
+invalidate_principals() for the users it changed.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from users.models import Profile
+
+
+# Bounds staleness should an invalidation be missed (e.g. a write made
+# while the cache was unreachable)
+PRINCIPAL_TTL = 5 * 60
+
+# User.profile (reverse one-to-one)
+PROFILE_RELATION = Profile._meta.get_field("user").remote_field
+
+
+def principal_key(user_id):
+    return f"principal:{user_id}"
+
+
+def invalidate_principal(user_id):
+    cache.delete(principal_key(user_id))
+
+
+def invalidate_principals(user_ids):
+    """
+    Drop cached principals after a bulk write that sends no signals.
+    """
+    cache.delete_many([principal_key(user_id) for user_id in user_ids])
+
+
+def _field_values(instance, exclude=()):
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in exclude
+    }
+
+
+def _from_values(model, values):
+    """
+    Rebuild a saved instance; fields missing from `values` are deferred.
+    """
+    return model.from_db(router.db_for_read(model), list(values), list(values.values()))
+
+
+def attach_profile(user, profile):
+    """
+    Cache `profile` (or None: no profile) as `user.profile`.
+    """
+    PROFILE_RELATION.set_cached_value(user, profile)
+    if profile is not None:
+        Profile.user.field.set_cached_value(profile, user)
+
+
+def _password_version(user):
+    """
+    Value of the token revoke claim for `user` (only when tokens carry it).
+    """
+    if api_settings.CHECK_REVOKE_TOKEN:
+        return get_md5_hash_password(user.password)
+    return None
+
+
+def store_principal(user):
+    """
+    Cache `user` and the profile already attached to it.
+    """
+    profile = PROFILE_RELATION.get_cached_value(user, default=None)
+    cache.set(principal_key(user.pk), {
+        "user": _field_values(user, exclude=("password",)),
+        "profile": _field_values(profile) if profile is not None else None,
+        "password_version": _password_version(user),
+    }, timeout=PRINCIPAL_TTL)
+
+
+def load_principal(user_id):
+    """
+    Returns (user with profile attached, password version) from the
+    cache, or None on a miss.
+    """
+    entry = cache.get(principal_key(user_id))
+    if entry is None:
+        return None
+
+    user = _from_values(get_user_model(), entry["user"])
+    profile = _from_values(Profile, entry["profile"]) if entry["profile"] else None
+    attach_profile(user, profile)
+    return user, entry["password_version"]
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication whose user lookup goes through the principal cache.
+    Applies the same checks as simplejwt (active user, revoked token).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        cached = load_principal(user_id)
+        if cached is not None:
+            user, password_version = cached
+        else:
+            try:
+                user = (
+                    self.user_model.objects
+                    .select_related("profile")
+                    .get(**{api_settings.USER_ID_FIELD: user_id})
+                )
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+            if not PROFILE_RELATION.is_cached(user):
+                attach_profile(user, None)
+            password_version = _password_version(user)
+            store_principal(user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != password_version:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
@@ -0,0 +1,126 @@
+"""
+Benchmark refresh-token rotation against a large token history.
+
+Seeds --tokens historic OutstandingToken rows (all but the newest
+blacklisted, as rotation leaves them) in a throwaway database, then
+times one rotation (verify + blacklist check, issue, blacklist the old
+token) with simplejwt's database blacklist and with the cache-backed
+RotatingRefreshToken (authn.tokens).
+
+Unless --configured-cache is given the cache is local memory.
+"""
+
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authn.tokens import RotatingRefreshToken
+from benchmarks.suite import percentile
+
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+SEED_BATCH_SIZE = 10000
+
+
+def seed_tokens(user, count):
+    """
+    Insert `count` outstanding tokens for `user`, blacklisting all but
+    the last one. Half are already expired.
+    """
+    now = timezone.now()
+    for start in range(0, count, SEED_BATCH_SIZE):
+        size = min(SEED_BATCH_SIZE, count - start)
+        tokens = OutstandingToken.objects.bulk_create(
+            OutstandingToken(
+                user=user,
+                jti=f"historic-{start + n}",
+                token="",
+                created_at=now,
+                expires_at=now + timedelta(days=-1 if (start + n) % 2 else 7),
+            )
+            for n in range(size)
+        )
+        BlacklistedToken.objects.bulk_create(
+            BlacklistedToken(token=token) for token in tokens if token.jti != f"historic-{count - 1}"
+        )
+
+
+def rotate(token_class, raw):
+    """
+    One refresh as RefreshView does it; returns the new raw token.
+    """
+    old = token_class(raw)
+    user = User.objects.get(id=old["user_id"])
+    new = token_class.for_user(user)
+    old.blacklist()
+    return str(new)
+
+
+def measure(token_class, user, iterations):
+    raw = str(token_class.for_user(user))
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            raw = rotate(token_class, raw)
+            timings.append(time.perf_counter() - started)
+        queries.append(len(captured.captured_queries))
+
+    timings.sort()
+    return timings, queries
+
+
+class Command(BaseCommand):
+    help = "Compare refresh rotation with the database and the cache token blacklist."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tokens", type=int, default=1000000, help="Historic tokens to seed.")
+        parser.add_argument("--iterations", type=int, default=200, help="Rotations per store.")
+        parser.add_argument(
+            "--configured-cache", action="store_true",
+            help="Use settings.CACHES (e.g. Redis) instead of a local memory cache.",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            caches = override_settings() if options["configured_cache"] else override_settings(CACHES=LOCMEM_CACHES)
+            with caches:
+                self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+    def run(self, options):
+        user = User.objects.create_user("bench-refresh")
+
+        started = time.perf_counter()
+        seed_tokens(user, options["tokens"])
+        self.stdout.write(f"seeded {options['tokens']:,} tokens in {time.perf_counter() - started:.1f}s")
+
+        for name, token_class in (("database", RefreshToken), ("cache", RotatingRefreshToken)):
+            timings, queries = measure(token_class, user, options["iterations"])
+            self.stdout.write(
+                f"{name:<10} p50={percentile(timings, 50) * 1000:7.2f} ms "
+                f"p95={percentile(timings, 95) * 1000:7.2f} ms "
+                f"queries={sum(queries) / len(queries):.1f}"
+            )
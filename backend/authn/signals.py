@@ -0,0 +1,31 @@
+"""
+Principal cache invalidation (authn.authentication).
+
+Any save() or delete() of a user or their profile drops the cached
+principal (bulk writes must call invalidate_principals themselves), so
+deactivation, password changes and profile updates take effect on the
+next request rather than after PRINCIPAL_TTL. The entry is dropped
+once the write commits, so a concurrent request cannot re-cache the
+old row in between.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Profile
+
+from .authentication import invalidate_principal
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_principal(user_id))
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_principal(user_id))
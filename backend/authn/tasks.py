@@ -0,0 +1,100 @@
+"""
+Celery tasks for refresh-token housekeeping.
+"""
+
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from core.cache_backends import FAILOVER_ERRORS
+
+from .tokens import SYNC_CURSOR_KEY, blacklist_cache, revoke_jtis
+
+
+logger = logging.getLogger(__name__)
+
+# Rows per DELETE / per cache round of the sync
+PRUNE_BATCH_SIZE = 5000
+
+# Bounds a single run; the next scheduled run continues
+PRUNE_MAX_BATCHES = 200
+
+
+def sync_blacklisted_rows(now, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Copy unexpired database blacklist entries added since the last run
+    into the cache blacklist. Returns the number of JTIs copied.
+    """
+    store = blacklist_cache()
+    cursor = store.get(SYNC_CURSOR_KEY, 0)
+
+    rows = (
+        BlacklistedToken.objects
+        .filter(id__gt=cursor, token__expires_at__gt=now)
+        .values_list("id", "token__jti", "token__expires_at")
+        .order_by("id")
+        .iterator(chunk_size=batch_size)
+    )
+
+    synced = 0
+    batch = {}
+    for row_id, jti, expires_at in rows:
+        batch[jti] = int((expires_at - now).total_seconds()) + 1
+        cursor = row_id
+        if len(batch) >= batch_size:
+            revoke_jtis(batch)
+            store.set(SYNC_CURSOR_KEY, cursor, timeout=None)
+            synced += len(batch)
+            batch = {}
+
+    revoke_jtis(batch)
+    store.set(SYNC_CURSOR_KEY, cursor, timeout=None)
+    return synced + len(batch)
+
+
+def prune_expired_tokens(now, batch_size=PRUNE_BATCH_SIZE, max_batches=PRUNE_MAX_BATCHES):
+    """
+    Delete expired OutstandingToken rows (and, by cascade, their
+    BlacklistedToken rows) in batches of `batch_size`.
+    Returns the number of outstanding tokens deleted.
+    """
+    deleted = 0
+    for _ in range(max_batches):
+        ids = list(
+            OutstandingToken.objects
+            .filter(expires_at__lte=now)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+
+        OutstandingToken.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+    return deleted
+
+
+@shared_task(ignore_result=True)
+def sync_token_blacklist():
+    """
+    Keep simplejwt's blacklist tables small and mirrored in the cache.
+
+    - Copies rows added since the last run (written while the cache was
+      unreachable, or by plain simplejwt tokens) into the cache
+    - Prunes expired rows in batches; expired tokens fail validation
+      regardless, so their rows are dead weight
+    """
+    now = timezone.now()
+
+    try:
+        synced = sync_blacklisted_rows(now)
+    except FAILOVER_ERRORS:
+        logger.warning("Token blacklist cache unavailable; sync skipped.")
+        synced = 0
+
+    deleted = prune_expired_tokens(now)
+    logger.info("Token blacklist: synced %s JTIs, pruned %s expired tokens.", synced, deleted)
+    return {"synced": synced, "pruned": deleted}
@@ -1,3 +1,153 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from authn.authentication import invalidate_principals, principal_key
+from authn.tasks import sync_token_blacklist
+from authn.tokens import RotatingRefreshToken, revoked_key
+from users.models import Profile
+
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("quinn", password="pw")
+        Profile.objects.create(user=self.user, currency="EUR")
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_user_and_profile_come_from_the_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/profile/").json()["currency"], "EUR")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/profile/").json()["currency"], "EUR")
+
+        entry = cache.get(principal_key(self.user.id))
+        self.assertNotIn("password", entry["user"])
+
+    def test_profile_update_invalidates(self):
+        self.client.get("/api/profile/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put("/api/profile/", {"monthly_income": "100.00", "currency": "USD"}, format="json")
+
+        self.assertIsNone(cache.get(principal_key(self.user.id)))
+        self.assertEqual(self.client.get("/api/profile/").json()["currency"], "USD")
+
+    def test_deactivation_invalidates(self):
+        self.assertEqual(self.client.get("/api/profile/").status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertEqual(self.client.get("/api/profile/").status_code, 401)
+
+
+    def test_bulk_updates_need_explicit_invalidation(self):
+        self.assertEqual(self.client.get("/api/profile/").status_code, 200)
+
+        # QuerySet.update() sends no signals: the cached principal survives
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/api/profile/").status_code, 200)
+
+        invalidate_principals([self.user.pk])
+        self.assertEqual(self.client.get("/api/profile/").status_code, 401)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TokenBlacklistTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("rory", password="pw")
+        self.client = APIClient()
+
+    def test_rotation_uses_the_cache_blacklist(self):
+        self.client.post("/api/auth/login/", {"username": "rory", "password": "pw"}, format="json")
+        old_cookie = self.client.cookies["refresh_token"].value
+
+        # The user, and the not-yet-synced blacklist rows for this JTI
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.post("/api/auth/refresh/").status_code, 200)
+
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertIsNotNone(cache.get(revoked_key(RotatingRefreshToken(old_cookie, verify=False)["jti"])))
+
+        self.client.cookies["refresh_token"] = old_cookie
+        self.assertEqual(self.client.post("/api/auth/refresh/").status_code, 401)
+
+    def test_tokens_from_the_database_blacklist_stay_revoked(self):
+        legacy = RefreshToken.for_user(self.user)
+        legacy.blacklist()
+
+        with self.assertRaises(TokenError):
+            RotatingRefreshToken(str(legacy))
+
+    def test_falls_back_to_the_database_while_the_cache_is_down(self):
+        token = RotatingRefreshToken.for_user(self.user)
+        down = mock.patch("authn.tokens.revoke_jtis", side_effect=ConnectionError("Redis is down"))
+        with down, self.assertLogs("authn.tokens", "WARNING"):
+            token.blacklist()
+
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=token["jti"]).exists())
+        with self.assertRaises(TokenError), self.assertLogs("authn.tokens", "WARNING"), \
+                mock.patch.object(cache, "get_many", side_effect=ConnectionError("Redis is down")):
+            RotatingRefreshToken(str(token))
+
+    def test_outage_revocation_holds_after_recovery_before_the_sync(self):
+        self.client.post("/api/auth/login/", {"username": "rory", "password": "pw"}, format="json")
+        old_cookie = self.client.cookies["refresh_token"].value
+
+        down = mock.patch("authn.tokens.revoke_jtis", side_effect=ConnectionError("Redis is down"))
+        with down, self.assertLogs("authn.tokens", "WARNING"):
+            self.assertEqual(self.client.post("/api/auth/refresh/").status_code, 200)
+
+        # Redis is back; the rotated token is only in the database
+        self.assertIsNone(cache.get(revoked_key(RotatingRefreshToken(old_cookie, verify=False)["jti"])))
+        self.client.cookies["refresh_token"] = old_cookie
+        self.assertEqual(self.client.post("/api/auth/refresh/").status_code, 401)
+
+    def test_sync_task_mirrors_live_rows_and_prunes_expired_ones(self):
+        live = RefreshToken.for_user(self.user)
+        live.blacklist()
+        expired = OutstandingToken.objects.create(
+            user=self.user, jti="expired", token="", expires_at=timezone.now() - timedelta(days=1),
+        )
+        BlacklistedToken.objects.create(token=expired)
+
+        result = sync_token_blacklist()
+
+        self.assertEqual(result, {"synced": 1, "pruned": 1})
+        self.assertIsNotNone(cache.get(revoked_key(live["jti"])))
+        self.assertFalse(OutstandingToken.objects.filter(jti="expired").exists())
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+        # Incremental: only rows added since the last run are copied
+        self.assertEqual(sync_token_blacklist()["synced"], 0)
+        newer = RefreshToken.for_user(self.user)
+        newer.blacklist()
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            self.assertEqual(sync_token_blacklist()["synced"], 1)
+        self.assertIsNotNone(cache.get(revoked_key(newer["jti"])))
+        # One round trip per batch, not per JTI
+        set_many.assert_called_once()
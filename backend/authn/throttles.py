@@ -2,19 +2,19 @@
 Custom throttles for authentication abuse protection.
 """
 
-from rest_framework.throttling import SimpleRateThrottle
+from core.throttles import GCRAThrottle
 
 
-class LoginThrottle(SimpleRateThrottle):
+class LoginThrottle(GCRAThrottle):
     scope = "login"
 
     def get_cache_key(self, request, view):
         # Throttle by IP address
-        return self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
 
 
-class RefreshThrottle(SimpleRateThrottle):
+class RefreshThrottle(GCRAThrottle):
     scope = "refresh"
 
     def get_cache_key(self, request, view):
-        return self.get_ident(request)
+        return self.cache_format % {"scope": self.scope, "ident": self.get_ident(request)}
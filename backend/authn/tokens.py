@@ -0,0 +1,137 @@
+"""
+Refresh tokens with a cache-backed blacklist.
+
+Purpose:
+- Issue and rotate refresh tokens without database writes (simplejwt's
+  RefreshToken inserts an OutstandingToken row per token)
+- Keep revoked JTIs in Redis with a TTL equal to the token's remaining
+  lifetime, so the blacklist only ever holds live revoked tokens and a
+  check is one GET instead of a join over ever-growing tables
+
+simplejwt's tables are still the fallback:
+- Tokens issued before this store existed carry no REVOCATION_CLAIM;
+  they are checked against the tables as well until they expire
+- While Redis is unreachable, revocations are written to the tables and
+  checks read them; authn.tasks.sync_token_blacklist copies such rows
+  into Redis and prunes expired ones
+- Rows the sync has not copied yet (id above SYNC_CURSOR_KEY) are
+  checked on every validation, so a revocation written during an outage
+  holds as soon as Redis is back, not only after the next sync. A lost
+  cursor (flushed Redis) makes every row count as not yet copied.
+
+Revocations made while Redis was healthy exist only in Redis: a flush
+or eviction un-revokes them. The instance must persist its data (AOF)
+and must not use an eviction policy that drops keys with a TTL
+(volatile-*, allkeys-*).
+"""
+
+import logging
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+from core.cache_backends import FAILOVER_ERRORS
+
+
+logger = logging.getLogger(__name__)
+
+# CACHES alias holding revoked JTIs; the default cache is used when it
+# is not configured (local development, tests)
+DEFAULT_BLACKLIST_CACHE = "redis"
+
+# Highest BlacklistedToken id already copied to the cache (see
+# authn.tasks.sync_blacklisted_rows). Kept in the blacklist cache itself,
+# so a flushed Redis also loses it.
+SYNC_CURSOR_KEY = "revoked:synced-id"
+
+# Marks tokens whose revocation is tracked in the cache
+REVOCATION_CLAIM = "rvk"
+REVOCATION_CACHE = "cache"
+
+# Revocations are written with one set_many per TTL bucket; rounding a
+# TTL up only keeps the entry of an already-expired token a bit longer
+REVOCATION_TTL_STEP = 60 * 60
+
+
+def blacklist_cache():
+    """
+    The cache for revoked JTIs. Deliberately not the failover "default"
+    cache: a revocation kept only in a local fallback would be lost when
+    Redis comes back, so errors must surface and reach the database.
+    """
+    alias = getattr(settings, "TOKEN_BLACKLIST_CACHE", DEFAULT_BLACKLIST_CACHE)
+    return caches[alias if alias in settings.CACHES else "default"]
+
+
+def revoked_key(jti):
+    return f"revoked:{jti}"
+
+
+def revoke_jtis(ttls):
+    """
+    Mark {jti: seconds to expiry} as revoked, in one round trip per
+    REVOCATION_TTL_STEP bucket. Raises FAILOVER_ERRORS if the cache is
+    unreachable.
+    """
+    buckets = defaultdict(dict)
+    for jti, ttl in ttls.items():
+        if ttl > 0:
+            buckets[-(-ttl // REVOCATION_TTL_STEP) * REVOCATION_TTL_STEP][revoked_key(jti)] = 1
+
+    store = blacklist_cache()
+    for ttl, keys in buckets.items():
+        store.set_many(keys, timeout=ttl)
+
+
+class RotatingRefreshToken(RefreshToken):
+    """
+    RefreshToken whose blacklist lives in the cache.
+    """
+    no_copy_claims = RefreshToken.no_copy_claims + (REVOCATION_CLAIM,)
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which records an OutstandingToken
+        token = super(BlacklistMixin, cls).for_user(user)
+        token[REVOCATION_CLAIM] = REVOCATION_CACHE
+        return token
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+
+        try:
+            entries = blacklist_cache().get_many([revoked_key(jti), SYNC_CURSOR_KEY])
+        except FAILOVER_ERRORS:
+            logger.warning("Token blacklist cache unavailable; checking the database.")
+            entries = None
+
+        if entries is not None and revoked_key(jti) in entries:
+            raise TokenError(_("Token is blacklisted"))
+
+        if entries is None or self.payload.get(REVOCATION_CLAIM) != REVOCATION_CACHE:
+            super().check_blacklist()
+            return
+
+        # Revocations written to the tables and not copied to the cache yet
+        unsynced = BlacklistedToken.objects.filter(
+            id__gt=entries.get(SYNC_CURSOR_KEY, 0), token__jti=jti,
+        )
+        if unsynced.exists():
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+
+        try:
+            revoke_jtis({jti: self.payload["exp"] - int(time.time())})
+        except FAILOVER_ERRORS:
+            logger.warning("Token blacklist cache unavailable; blacklisting in the database.")
+            return super().blacklist()
+        return None
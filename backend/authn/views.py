@@ -13,8 +13,8 @@ from rest_framework.permissions import AllowAny
 from django.contrib.auth import authenticate
 from rest_framework import status
 
-from rest_framework_simplejwt.tokens import RefreshToken
 from .throttles import RefreshThrottle,LoginThrottle
+from .tokens import RotatingRefreshToken
 from django.contrib.auth.models import User
 
 
@@ -37,7 +37,7 @@ class LoginView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = RotatingRefreshToken.for_user(user)
 
         response = Response({
             "access": str(refresh.access_token)
@@ -71,7 +71,7 @@ class RefreshView(APIView):
 
         try:
             # Parse old refresh token
-            old_refresh = RefreshToken(refresh_token)
+            old_refresh = RotatingRefreshToken(refresh_token)
 
             # Extract user_id
             user_id = old_refresh["user_id"]
@@ -80,7 +80,7 @@ class RefreshView(APIView):
             user = User.objects.get(id=user_id)
 
             # Issue new refresh + access tokens
-            new_refresh = RefreshToken.for_user(user)
+            new_refresh = RotatingRefreshToken.for_user(user)
             new_access = str(new_refresh.access_token)
 
             response = Response(
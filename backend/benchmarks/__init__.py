@@ -0,0 +1,5 @@
+"""
+Benchmark harnesses, kept outside the Django apps: they patch views and
+services (throttling, the ML client) and must never be imported by
+runtime code. Run through the bench_* management commands.
+"""
@@ -0,0 +1,278 @@
+"""
+API hot-path benchmark suite.
+
+Purpose:
+- Seed a configurable dataset (users x transactions x budgets x goals)
+- Measure latency percentiles and DB query counts per endpoint, with
+  the cache cold (cleared before every request) and warm
+- Produce a JSON-serializable report so runs can be compared
+
+Requests go through the full Django/DRF stack with real JWT auth
+(rest_framework.test.APIClient). Throttling is disabled and the ML
+service is stubbed out so numbers only reflect this codebase.
+
+Run it with `manage.py bench_api`, which uses a throwaway database.
+"""
+
+import platform
+import random
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from authn.tokens import RotatingRefreshToken
+from core import caching
+from core.models import Budget, Goal, Transaction
+from core.services.periods import month_start
+from core.services.rollups import rebuild_rollups
+
+
+PASSWORD = "bench-password"
+CATEGORIES = ["Food", "Rent", "Travel", "Utilities", "Shopping", "Health", "Fun", "Misc"]
+
+COLD = "cold"
+WARM = "warm"
+
+
+def seed_dataset(users=10, transactions=1000, budgets=5, goals=3, days=365, seed=42):
+    """
+    Create `users` users, each with the given number of transactions
+    (spread over the last `days` days), budgets and goals.
+    Rollups are rebuilt at the end. Returns the users.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    password = make_password(PASSWORD)
+
+    User.objects.bulk_create(
+        User(username=f"bench-{i}", password=password) for i in range(users)
+    )
+    created = list(User.objects.filter(username__startswith="bench-").order_by("id"))
+
+    for user in created:
+        Transaction.objects.bulk_create(
+            (
+                Transaction(
+                    user=user,
+                    type="income" if rng.random() < 0.1 else "expense",
+                    category=rng.choice(CATEGORIES),
+                    amount=Decimal(rng.randint(100, 500000)) / 100,
+                    date=today - timedelta(days=rng.randrange(days)),
+                    note=f"Bench transaction {n}" if rng.random() < 0.5 else "",
+                )
+                for n in range(transactions)
+            ),
+            batch_size=1000,
+        )
+        Budget.objects.bulk_create(
+            Budget(
+                user=user,
+                category=CATEGORIES[n % len(CATEGORIES)],
+                limit_amount=Decimal(rng.randint(1000, 50000)),
+                start_date=month_start(today),
+                end_date=today + timedelta(days=30),
+            )
+            for n in range(budgets)
+        )
+        Goal.objects.bulk_create(
+            Goal(
+                user=user,
+                name=f"Goal {n}",
+                target_amount=Decimal(rng.randint(10000, 100000)),
+                saved_amount=Decimal(rng.randint(0, 10000)),
+                deadline=today + timedelta(days=90 * (n + 1)),
+            )
+            for n in range(goals)
+        )
+
+    rebuild_rollups()
+    return created
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(name, cache_mode, timings, queries):
+    timings = sorted(timings)
+    return {
+        "scenario": name,
+        "cache": cache_mode,
+        "iterations": len(timings),
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(timings) * 1000, 3),
+        "queries": {
+            "min": min(queries),
+            "max": max(queries),
+            "mean": round(statistics.fmean(queries), 2),
+        },
+    }
+
+
+def clear_caches():
+    cache.clear()
+    caching.local_cache.clear()
+
+
+class Scenario:
+    """
+    One benchmarked request. `request(client)` returns the response;
+    `setup(client)` runs untimed before each request.
+    """
+
+    def __init__(self, name, request, setup=None, expected_status=200):
+        self.name = name
+        self.request = request
+        self.setup = setup
+        self.expected_status = expected_status
+
+
+def build_scenarios(user):
+    """
+    Scenarios for the API hot paths, all acting as `user`.
+    """
+    state = {"refresh": str(RotatingRefreshToken.for_user(user))}
+
+    def create_transaction(client):
+        return client.post("/api/transactions/", {
+            "type": "expense", "category": "Food", "amount": "12.50",
+            "date": date.today().isoformat(),
+        }, format="json")
+
+    def login(client):
+        return client.post("/api/auth/login/", {
+            "username": user.username, "password": PASSWORD,
+        }, format="json")
+
+    def set_refresh_cookie(client):
+        client.cookies["refresh_token"] = state["refresh"]
+
+    def refresh(client):
+        response = client.post("/api/auth/refresh/")
+        state["refresh"] = response.cookies["refresh_token"].value
+        return response
+
+    return [
+        Scenario("dashboard", lambda client: client.get("/api/dashboard/summary/")),
+        Scenario("alerts", lambda client: client.get("/api/alerts/")),
+        Scenario("transactions_list", lambda client: client.get("/api/transactions/")),
+        Scenario("transactions_create", create_transaction, expected_status=201),
+        Scenario("login", login),
+        Scenario("refresh", refresh, setup=set_refresh_cookie),
+    ]
+
+
+def measure(scenario, client, iterations, cache_mode):
+    """
+    Time `iterations` requests of `scenario` and count their queries.
+    """
+    if cache_mode == WARM:
+        clear_caches()
+        if scenario.setup:
+            scenario.setup(client)
+        scenario.request(client)
+
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        if cache_mode == COLD:
+            clear_caches()
+        if scenario.setup:
+            scenario.setup(client)
+
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = scenario.request(client)
+            timings.append(time.perf_counter() - started)
+
+        if response.status_code != scenario.expected_status:
+            raise RuntimeError(
+                f"{scenario.name}: expected {scenario.expected_status}, got {response.status_code}"
+            )
+        queries.append(len(captured.captured_queries))
+
+    return summarize(scenario.name, cache_mode, timings, queries)
+
+
+def run_benchmarks(users=10, transactions=1000, budgets=5, goals=3,
+                   iterations=50, scenarios=None, seed=42):
+    """
+    Seed a dataset, then benchmark every scenario cold and warm.
+    Returns the report dict.
+    """
+    seeded = seed_dataset(users, transactions, budgets, goals, seed=seed)
+    user = seeded[0]
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RotatingRefreshToken.for_user(user).access_token}")
+
+    results = []
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(APIView, "check_throttles", lambda self, request: None))
+        stack.enter_context(mock.patch("core.services.alerts.fetch_ml_insights", return_value=[]))
+
+        for scenario in build_scenarios(user):
+            if scenarios and scenario.name not in scenarios:
+                continue
+            for cache_mode in (COLD, WARM):
+                results.append(measure(scenario, client, iterations, cache_mode))
+
+    return {
+        "meta": {
+            "dataset": {
+                "users": users,
+                "transactions_per_user": transactions,
+                "budgets_per_user": budgets,
+                "goals_per_user": goals,
+                "seed": seed,
+            },
+            "iterations": iterations,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current):
+    """
+    Returns rows comparing two reports: (scenario, cache, p50 ratio,
+    p95 ratio, mean query delta). Ratios below 1 are improvements.
+    """
+    previous = {(r["scenario"], r["cache"]): r for r in baseline["results"]}
+
+    rows = []
+    for result in current["results"]:
+        before = previous.get((result["scenario"], result["cache"]))
+        if before is None:
+            continue
+        rows.append((
+            result["scenario"],
+            result["cache"],
+            result["p50_ms"] / before["p50_ms"] if before["p50_ms"] else None,
+            result["p95_ms"] / before["p95_ms"] if before["p95_ms"] else None,
+            round(result["queries"]["mean"] - before["queries"]["mean"], 2),
+        ))
+    return rows
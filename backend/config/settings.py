@@ -79,12 +79,24 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
 ]
 
+# Let the frontend read rate-limit state (core.throttles)
+CORS_EXPOSE_HEADERS = [
+    "RateLimit-Limit",
+    "RateLimit-Remaining",
+    "RateLimit-Reset",
+    "RateLimit-Policy",
+    "Retry-After",
+]
+
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:5173",
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.RateLimitHeadersMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -179,19 +191,30 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # simplejwt's JWTAuthentication with a cached user + profile
+        "authn.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
     "DEFAULT_THROTTLE_CLASSES": (
-        "rest_framework.throttling.UserRateThrottle",
-        "rest_framework.throttling.AnonRateThrottle",
+        "core.throttles.UserRateThrottle",
+        "core.throttles.AnonRateThrottle",
     ),
     "DEFAULT_THROTTLE_RATES": {
         "user": "1000/day",
         "anon": "100/day",
     },
+    # orjson-based JSON (core.renderers)
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"].update({
@@ -199,6 +222,26 @@ REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"].update({
     "refresh": "10/min",
 })
 
+# Cache alias (django-redis) holding GCRA throttle state (core.throttles)
+THROTTLE_CACHE = "redis"
+
+# Cache alias (django-redis) holding revoked refresh-token JTIs (authn.tokens)
+TOKEN_BLACKLIST_CACHE = "redis"
+
+
+# Bearer token guarding /api/metrics/; when unset the endpoint is only
+# served with DEBUG on. Set it (and configure the scraper) in production.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Send the Server-Timing header (core.middleware.ServerTimingMiddleware)
+# outside DEBUG. It exposes DB query counts and timings to every client.
+SERVER_TIMING = os.getenv("SERVER_TIMING") == "True"
+
+# Response compression (core.middleware.CompressionMiddleware)
+COMPRESSION_MIN_SIZE = 1024
+# Never compress responses carrying tokens (BREACH)
+COMPRESSION_EXCLUDE_PREFIXES = ("/api/auth/",)
+
 
 SIMPLE_JWT = {
     # Access token (short-lived)
@@ -239,14 +282,42 @@ CELERY_BROKER_URL = "redis://localhost:6379/0"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 
+# Periodic tasks (synced into django_celery_beat on beat startup)
+CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+CELERY_BEAT_SCHEDULE = {
+    "fleet-alerts": {
+        "task": "core.tasks.run_alerts_for_all_users",
+        "schedule": timedelta(minutes=15),
+    },
+    "token-blacklist": {
+        "task": "authn.tasks.sync_token_blacklist",
+        "schedule": timedelta(minutes=10),
+    },
+}
+
 # Redis cache configuration
+# "default" fails over to a local memory cache while Redis is unreachable
+# (core.cache_backends); short socket timeouts bound how long a dead
+# Redis can stall a request before that happens.
 CACHES = {
     "default": {
+        "BACKEND": "core.cache_backends.FailoverCache",
+        "OPTIONS": {
+            "PRIMARY": "redis",
+            "RETRY_AFTER": 30,
+            "FALLBACK_MAX_TIMEOUT": 30,
+            "OVERFLOW_PURGE_PATTERNS": ["gen:*", "principal:*"],
+        }
+    },
+    "redis": {
         "BACKEND": "django_redis.cache.RedisCache",
         "LOCATION": os.getenv("REDIS_URL"),
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
             "SSL": True,  # REQUIRED for Upstash
+            "SOCKET_CONNECT_TIMEOUT": 0.5,
+            "SOCKET_TIMEOUT": 0.5,
+            "COMPRESSOR": "django_redis.compressors.zlib.ZlibCompressor",
         }
-    }
+    },
 }
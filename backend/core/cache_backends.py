@@ -0,0 +1,309 @@
+"""
+Cache backend that survives a Redis outage.
+
+Purpose:
+- Route every cache call to the primary (Redis) backend while it is healthy
+- On a connection error, fail over to a local memory cache for
+  RETRY_AFTER seconds instead of raising into views and throttles
+- Probe the primary again after the retry window and switch back
+
+Keys written while degraded only exist in the fallback. On recovery
+they are deleted from Redis so pre-outage values (notably generation
+counters, see core.caching) are never served after the outage; deleted
+generations are reseeded with a larger value, orphaning old entries.
+
+At most MAX_TRACKED_KEYS keys are tracked per outage. Beyond that the
+individual keys are unknown, so recovery deletes every key matching
+OVERFLOW_PURGE_PATTERNS instead: all generation counters (orphaning
+every derived entry, at the cost of a recompute per user) and cached
+principals.
+
+Limitation: the fallback is per process. While degraded, a generation
+bump made by one worker is invisible to the others, which keep serving
+entries built before the write. Every fallback write is therefore
+capped at FALLBACK_MAX_TIMEOUT seconds: generation counters expire and
+are reseeded (orphaning the entries keyed on them), so this staleness
+is bounded by the cap instead of the hour-long soft TTLs.
+
+Configured as the "default" cache; the primary is another CACHES alias:
+
+    "default": {
+        "BACKEND": "core.cache_backends.FailoverCache",
+        "OPTIONS": {"PRIMARY": "redis", "RETRY_AFTER": 30, "FALLBACK_MAX_TIMEOUT": 30,
+                    "OVERFLOW_PURGE_PATTERNS": ["gen:*", "principal:*"]},
+    }
+"""
+
+import logging
+import threading
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import RedisError
+
+from core import instrumentation, metrics
+
+
+logger = logging.getLogger(__name__)
+
+RETRY_AFTER_SECONDS = 30
+FALLBACK_MAX_ENTRIES = 10000
+
+# Longest any key lives in the fallback (see the module docstring);
+# matches core.caching.DEGRADED_SOFT_TTL
+FALLBACK_MAX_TIMEOUT = 30
+
+# Keys remembered for cleanup after an outage (per process)
+MAX_TRACKED_KEYS = 10000
+
+# Purged on recovery once more keys were written than could be tracked:
+# generation counters (core.caching) and principals (authn.authentication)
+OVERFLOW_PURGE_PATTERNS = ("gen:*", "principal:*")
+
+# Errors that mean "Redis is unreachable", not "bad call" (incr on a
+# missing key raises ValueError and must still reach the caller)
+FAILOVER_ERRORS = (ConnectionInterrupted, RedisError, OSError)
+
+
+backend_errors = metrics.counter(
+    "cache_backend_errors_total",
+    "Primary cache errors that triggered a failover, by operation."
+)
+backend_calls = metrics.counter(
+    "cache_backend_calls_total",
+    "Cache calls by serving backend (primary, fallback)."
+)
+untracked_keys = metrics.counter(
+    "cache_untracked_keys_total",
+    "Keys written during an outage beyond MAX_TRACKED_KEYS."
+)
+backend_transitions = metrics.counter(
+    "cache_backend_transitions_total",
+    "Primary cache health transitions (down, up)."
+)
+
+
+class BackendHealth:
+    """
+    Shared health state of a primary cache.
+
+    Django builds cache backends per thread, so the state lives here
+    (one object per primary alias) rather than on the backend instance.
+    """
+    PROBE_KEY = "cache:probe"
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        self.down_until = None
+        self.written_while_down = set()
+        self.overflowed = False
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self):
+        return self.down_until is None
+
+    def should_try_primary(self):
+        down_until = self.down_until
+        return down_until is None or time.monotonic() >= down_until
+
+    def mark_down(self):
+        """
+        Returns True when this call started a new outage.
+        """
+        with self._lock:
+            started = self.down_until is None
+            self.down_until = time.monotonic() + self.retry_after
+            return started
+
+    def mark_up(self):
+        with self._lock:
+            self.down_until = None
+            self.written_while_down = set()
+            self.overflowed = False
+
+    def track(self, keys):
+        """
+        Returns True when this call started overflowing MAX_TRACKED_KEYS.
+        """
+        with self._lock:
+            new = set(keys) - self.written_while_down
+            if len(self.written_while_down) + len(new) <= MAX_TRACKED_KEYS:
+                self.written_while_down.update(new)
+                return False
+
+            untracked_keys.inc(len(new))
+            started = not self.overflowed
+            self.overflowed = True
+            return started
+
+
+_health = {}
+_health_lock = threading.Lock()
+
+
+def get_health(alias, retry_after=RETRY_AFTER_SECONDS):
+    with _health_lock:
+        health = _health.get(alias)
+        if health is None:
+            health = _health[alias] = BackendHealth(retry_after)
+        return health
+
+
+class FailoverCache(BaseCache):
+    """
+    Django cache backend: primary cache with a local memory fallback.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+
+        self.primary_alias = options.get("PRIMARY", "redis")
+        self.health = get_health(
+            self.primary_alias,
+            options.get("RETRY_AFTER", RETRY_AFTER_SECONDS)
+        )
+        self.fallback_max_timeout = options.get("FALLBACK_MAX_TIMEOUT", FALLBACK_MAX_TIMEOUT)
+        self.overflow_purge_patterns = options.get("OVERFLOW_PURGE_PATTERNS", OVERFLOW_PURGE_PATTERNS)
+        # LocMemCache storage is shared per location across threads
+        self.fallback = LocMemCache(
+            location or f"failover-{self.primary_alias}",
+            {
+                "TIMEOUT": params.get("TIMEOUT", 300),
+                "OPTIONS": {"MAX_ENTRIES": options.get("FALLBACK_MAX_ENTRIES", FALLBACK_MAX_ENTRIES)},
+            }
+        )
+
+    @property
+    def primary(self):
+        return caches[self.primary_alias]
+
+    def _call(self, operation, *args, written=(), **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._dispatch(operation, *args, written=written, **kwargs)
+        finally:
+            instrumentation.record("cache", time.perf_counter() - started)
+
+    def _dispatch(self, operation, *args, written=(), **kwargs):
+        if self.health.should_try_primary():
+            try:
+                if not self.health.healthy:
+                    self._recover()
+                result = getattr(self.primary, operation)(*args, **kwargs)
+            except FAILOVER_ERRORS as exc:
+                self._fail_over(operation, exc)
+            else:
+                backend_calls.inc(backend="primary")
+                return result
+
+        if written and self.health.track(written):
+            logger.warning(
+                "Over %s keys written during the outage of %r; recovery will purge %s.",
+                MAX_TRACKED_KEYS, self.primary_alias, ", ".join(self.overflow_purge_patterns)
+            )
+        if "timeout" in kwargs:
+            kwargs["timeout"] = self._fallback_timeout(kwargs["timeout"])
+        backend_calls.inc(backend="fallback")
+        return getattr(self.fallback, operation)(*args, **kwargs)
+
+    def _fallback_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.fallback_max_timeout
+        return min(timeout, self.fallback_max_timeout)
+
+    def _fail_over(self, operation, exc):
+        backend_errors.inc(operation=operation)
+        if self.health.mark_down():
+            backend_transitions.inc(state="down")
+            # Start the outage from an empty fallback: whatever it held
+            # from an earlier outage may be long out of date
+            self.fallback.clear()
+            logger.warning(
+                "Cache %r unavailable (%s); using local fallback for %ss.",
+                self.primary_alias, exc, self.health.retry_after
+            )
+
+    def _recover(self):
+        """
+        Probe the primary by dropping the keys written during the outage,
+        before the call that triggered the probe can read them.
+        Raises FAILOVER_ERRORS if the primary is still down.
+        """
+        keys = list(self.health.written_while_down)
+        if keys:
+            self.primary.delete_many(keys)
+        else:
+            self.primary.has_key(self.health.PROBE_KEY)
+
+        if self.health.overflowed:
+            self._purge_untracked()
+
+        self.health.mark_up()
+        backend_transitions.inc(state="up")
+        logger.info("Cache %r is back; dropped %s keys written during the outage.",
+                    self.primary_alias, len(keys))
+
+    def _purge_untracked(self):
+        """
+        Delete every key matching the purge patterns from the primary
+        (django-redis delete_pattern); primaries without pattern deletes
+        are cleared.
+        """
+        delete_pattern = getattr(self.primary, "delete_pattern", None)
+        if delete_pattern is None:
+            self.primary.clear()
+        else:
+            for pattern in self.overflow_purge_patterns:
+                delete_pattern(pattern)
+        logger.warning("Cache %r: purged %s after untracked outage writes.",
+                       self.primary_alias, ", ".join(self.overflow_purge_patterns))
+
+    # Django cache API
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("add", key, value, timeout=timeout, version=version, written=(key,))
+
+    def get(self, key, default=None, version=None):
+        return self._call("get", key, default=default, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set", key, value, timeout=timeout, version=version, written=(key,))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("touch", key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        return self._call("delete", key, version=version, written=(key,))
+
+    def get_many(self, keys, version=None):
+        return self._call("get_many", keys, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call("set_many", data, timeout=timeout, version=version, written=tuple(data))
+
+    def delete_many(self, keys, version=None):
+        return self._call("delete_many", keys, version=version, written=tuple(keys))
+
+    def has_key(self, key, version=None):
+        return self._call("has_key", key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._call("incr", key, delta=delta, version=version, written=(key,))
+
+    def decr(self, key, delta=1, version=None):
+        return self._call("decr", key, delta=delta, version=version, written=(key,))
+
+    def clear(self):
+        self.fallback.clear()
+        return self._call("clear")
+
+    def close(self, **kwargs):
+        # The primary is a CACHES alias of its own; Django closes it
+        pass
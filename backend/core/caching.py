@@ -0,0 +1,497 @@
+"""
+Cache conventions for per-user derived data.
+
+Purpose:
+- Single source of truth for dashboard / alerts cache keys and TTLs
+- Stale-while-revalidate reads with single-flight recomputation
+- Generation-counter invalidation shared by views and background tasks
+- Long-lived snapshots of closed-period (historical) dashboards
+
+Every derived key embeds the user's generation counter. Any write that
+can change derived data bumps the counter (bump_generation), which
+orphans all of the user's dashboard and alerts keys in O(1); orphaned
+entries simply age out. This is what makes hour-long TTLs safe.
+
+Entries are stored as envelopes {"value": ..., "fresh_until": epoch}.
+Within the soft TTL an entry is served as-is. Between the soft and the
+hard TTL it is still served, while exactly one holder of a cache lock
+(SET NX on Redis) refreshes it, preferably in a Celery task. Only a hard
+miss makes the request wait for a recompute, and concurrent hard
+misses wait for the lock holder instead of recomputing in parallel.
+
+Reads go through two tiers: a bounded, TTL-aware in-process LRU
+(LocalLRU) in front of the shared cache. Because keys embed the
+generation, which is always read from the shared cache, a worker can
+never serve another worker's invalidated payload from its local tier:
+the only per-request round trip is the tiny generation GET.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from core import instrumentation, metrics
+from core.services.alerts import build_alerts
+from core.services.dashboard import build_dashboard
+from core.services.sections import track_degraded
+from core.services.timeseries import build_timeseries
+from core.services.periods import iter_months, month_span, month_start, shift_month
+
+
+logger = logging.getLogger(__name__)
+
+# Writes invalidate via the generation counter, so TTLs only bound
+# staleness from the calendar (dashboard) and ML insights (alerts)
+DASHBOARD_SOFT_TTL = 60 * 60
+DASHBOARD_HARD_TTL = 12 * 60 * 60
+ALERTS_SOFT_TTL = 15 * 60
+ALERTS_HARD_TTL = 6 * 60 * 60
+
+# Payloads built with degraded sections (core.services.sections) are
+# kept fresh only briefly so the next read soon retries the full build
+DEGRADED_SOFT_TTL = 30
+
+# Closed-period dashboards only change through writes, which change
+# their key; the TTL just bounds how long unused snapshots linger
+SNAPSHOT_TTL = 30 * 24 * 60 * 60
+
+# Recompute lock: long enough for a slow recompute, short enough to
+# recover from a crashed holder
+LOCK_TTL = 30
+
+# How long a hard miss waits for another holder's result
+LOCK_WAIT_SECONDS = 2.0
+LOCK_POLL_SECONDS = 0.05
+
+
+# In-process tier sizing (per worker process)
+LOCAL_MAX_ENTRIES = 1024
+LOCAL_TTL = 5 * 60
+
+
+cache_reads = metrics.counter(
+    "derived_cache_reads_total",
+    "Dashboard/alerts cache reads by section and result (fresh, stale, miss)."
+)
+tier_reads = metrics.counter(
+    "derived_cache_tier_reads_total",
+    "Two-tier cache lookups by tier (local, shared) and result (hit, miss)."
+)
+
+
+class LocalLRU:
+    """
+    Bounded, TTL-aware, thread-safe in-process LRU.
+    """
+
+    def __init__(self, max_entries=LOCAL_MAX_ENTRIES, ttl=LOCAL_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + min(ttl or self.ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_cache = LocalLRU()
+
+
+def generation_key(user_id):
+    return f"gen:{user_id}"
+
+
+def month_generation_key(user_id, month):
+    return f"gen:{user_id}:{month:%Y-%m}"
+
+
+def settings_generation_key(user_id):
+    return f"gen:{user_id}:settings"
+
+
+def _new_generation():
+    # Time-based seed: if the counter is ever evicted, the replacement
+    # is larger than any earlier value, so old keys are never revived
+    return time.time_ns()
+
+
+def _read_generations(keys):
+    """
+    Returns {key: generation} in one round trip (plus one per counter
+    that does not exist yet).
+    """
+    generations = cache.get_many(list(keys))
+    for key in keys:
+        if key not in generations:
+            generation = _new_generation()
+            if not cache.add(key, generation, timeout=None):
+                generation = cache.get(key, generation)
+            generations[key] = generation
+    return generations
+
+
+def get_generation(user_id):
+    """
+    Returns the user's current data generation.
+    """
+    key = generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = _read_generations([key])[key]
+    return generation
+
+
+def get_generations(user_ids):
+    """
+    Returns {user_id: generation} in one round trip (plus one per
+    user whose counter does not exist yet).
+    """
+    keys = {generation_key(user_id): user_id for user_id in user_ids}
+    return {keys[key]: generation for key, generation in _read_generations(keys).items()}
+
+
+def _bump(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        generation = _new_generation()
+        cache.set(key, generation, timeout=None)
+        return generation
+
+
+def bump_generation(user_id, months=None):
+    """
+    Invalidate every derived cache entry of a user.
+    Call after any write that can change dashboard or alerts output.
+
+    Transaction writes pass the months they touched, which also
+    invalidates closed-period snapshots covering those months. Any
+    other write (budgets, goals, profile) invalidates all snapshots.
+    """
+    if months is None:
+        _bump(settings_generation_key(user_id))
+    else:
+        for month in {month_start(month) for month in months}:
+            _bump(month_generation_key(user_id, month))
+
+    return _bump(generation_key(user_id))
+
+
+def dashboard_key(user_id, month, generation):
+    """
+    Cache key for a user's dashboard for the month containing `month`.
+    """
+    return f"dashboard:{user_id}:g{generation}:{month:%Y-%m}"
+
+
+def alerts_key(user_id, generation, month=None):
+    """
+    Cache key for a user's combined alerts.
+    Alerts are evaluated against the current month, so it is part of the key.
+    """
+    month = month or date.today()
+    return f"alerts:{user_id}:g{generation}:{month:%Y-%m}"
+
+
+def period_key(user_id, first, last):
+    """
+    Cache key for a dashboard over the months `first`..`last`.
+
+    Closed periods (ending before the current month) can only change
+    through budget/goal/profile writes or backdated transactions, so
+    their key is built from the settings generation and the generations
+    of the months the payload reads (the period and the equally long
+    period before it, for the trend insight). Writes to other months
+    leave the snapshot valid; budgets in such payloads only count spend
+    inside the period for this reason (dashboard.budget_window).
+
+    Periods reaching into the current month use the user generation.
+    """
+    if last >= month_start(date.today()):
+        return f"dashboard:{user_id}:g{get_generation(user_id)}:{first:%Y-%m}:{last:%Y-%m}"
+
+    span = month_span(first, last)
+    keys = [settings_generation_key(user_id)] + [
+        month_generation_key(user_id, month)
+        for month in iter_months(shift_month(first, -span), last)
+    ]
+    generations = _read_generations(keys)
+    digest = hashlib.blake2b(
+        ":".join(str(generations[key]) for key in keys).encode(),
+        digest_size=8
+    ).hexdigest()
+    return f"dashboard:{user_id}:snapshot:{first:%Y-%m}:{last:%Y-%m}:{digest}"
+
+
+class Section:
+    """
+    A cacheable per-user payload: how to key it, build it and age it.
+    """
+
+    def __init__(self, name, key, build, soft_ttl, hard_ttl):
+        self.name = name
+        self.key = key
+        self.build = build
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+
+
+SECTIONS = {
+    "dashboard": Section(
+        "dashboard",
+        key=lambda user_id: dashboard_key(user_id, date.today(), get_generation(user_id)),
+        build=build_dashboard,
+        soft_ttl=DASHBOARD_SOFT_TTL,
+        hard_ttl=DASHBOARD_HARD_TTL,
+    ),
+    "alerts": Section(
+        "alerts",
+        key=lambda user_id: alerts_key(user_id, get_generation(user_id)),
+        build=build_alerts,
+        soft_ttl=ALERTS_SOFT_TTL,
+        hard_ttl=ALERTS_HARD_TTL,
+    ),
+}
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _acquire_lock(key):
+    """
+    Take the recompute lock for `key`. Returns the token proving
+    ownership, or None if another caller holds the lock.
+    """
+    token = uuid.uuid4().hex
+    return token if cache.add(_lock_key(key), token, timeout=LOCK_TTL) else None
+
+
+def _release_lock(key, token):
+    """
+    Delete the lock only while it still holds `token`: once it has
+    expired another caller may have acquired it.
+    """
+    if token is not None and cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def store(key, value, soft_ttl, hard_ttl):
+    """
+    Store `value` as a fresh envelope in both tiers.
+    """
+    entry = {"value": value, "fresh_until": time.time() + soft_ttl}
+    cache.set(key, entry, timeout=hard_ttl)
+    local_cache.set(key, entry, ttl=soft_ttl)
+
+
+def _read_entry(key):
+    """
+    Two-tier read. The local tier only answers with fresh entries, so
+    a stale local copy never hides a refresh another worker already made.
+    """
+    entry = local_cache.get(key)
+    if entry is not None and time.time() < entry["fresh_until"]:
+        tier_reads.inc(tier="local", result="hit")
+        instrumentation.count("cache_hit")
+        return entry
+    tier_reads.inc(tier="local", result="miss")
+
+    entry = cache.get(key)
+    if entry is None:
+        tier_reads.inc(tier="shared", result="miss")
+        instrumentation.count("cache_miss")
+        return None
+    tier_reads.inc(tier="shared", result="hit")
+    instrumentation.count("cache_hit")
+
+    remaining = entry["fresh_until"] - time.time()
+    if remaining > 0:
+        local_cache.set(key, entry, ttl=remaining)
+    return entry
+
+
+def store_many(values, soft_ttl, hard_ttl):
+    """
+    Store {key: value} as fresh envelopes in one round trip.
+    """
+    fresh_until = time.time() + soft_ttl
+    cache.set_many(
+        {key: {"value": value, "fresh_until": fresh_until} for key, value in values.items()},
+        timeout=hard_ttl
+    )
+
+
+def refresh(section_name, user, key=None, token=None):
+    """
+    Recompute and store a section for `user`, then release its lock if
+    `token` (from _acquire_lock) still owns it.
+
+    The key (and so the generation) is resolved before computing: if a
+    write lands mid-computation the result goes to the orphaned key.
+    """
+    section = SECTIONS[section_name]
+    key = key or section.key(user.id)
+    try:
+        with track_degraded() as degraded:
+            value = section.build(user)
+        soft_ttl = DEGRADED_SOFT_TTL if degraded else section.soft_ttl
+        store(key, value, soft_ttl, section.hard_ttl)
+        return value
+    finally:
+        _release_lock(key, token)
+
+
+def _schedule_refresh(section_name, user, token):
+    """
+    Refresh in a Celery worker, handing it the lock token; fall back to
+    refreshing inline when the broker is unavailable so the lock is never
+    left dangling.
+    """
+    from core.tasks import refresh_cached_section
+
+    try:
+        refresh_cached_section.apply_async((section_name, user.id, token), retry=False)
+    except Exception:
+        logger.warning("Could not enqueue %s refresh; refreshing inline.", section_name)
+        refresh(section_name, user, token=token)
+
+
+def get_section(section_name, user):
+    """
+    Return a section payload for `user` using stale-while-revalidate.
+    """
+    section = SECTIONS[section_name]
+    key = section.key(user.id)
+
+    entry = _read_entry(key)
+    if entry is not None:
+        if time.time() < entry["fresh_until"]:
+            cache_reads.inc(section=section_name, result="fresh")
+            return entry["value"]
+
+        cache_reads.inc(section=section_name, result="stale")
+        token = _acquire_lock(key)
+        if token is not None:
+            _schedule_refresh(section_name, user, token)
+        return entry["value"]
+
+    cache_reads.inc(section=section_name, result="miss")
+    token = _acquire_lock(key)
+    if token is not None:
+        return refresh(section_name, user, key, token)
+
+    # Another request is recomputing: wait for its result
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_SECONDS)
+        entry = _read_entry(key)
+        if entry is not None:
+            return entry["value"]
+
+    return section.build(user)
+
+
+def get_dashboard(user, first=None, last=None):
+    """
+    Return the dashboard for the months `first`..`last`.
+
+    The current month goes through the stale-while-revalidate section.
+    Any other period is computed once per key: closed periods are kept
+    for SNAPSHOT_TTL, open ranges for DASHBOARD_SOFT_TTL.
+    """
+    current = month_start(date.today())
+    first = month_start(first or current)
+    last = month_start(last or first)
+
+    if first == last == current:
+        return get_section("dashboard", user)
+
+    key = period_key(user.id, first, last)
+    entry = _read_entry(key)
+    if entry is not None:
+        cache_reads.inc(section="dashboard_period", result="fresh")
+        return entry["value"]
+
+    cache_reads.inc(section="dashboard_period", result="miss")
+    with track_degraded() as degraded:
+        value = build_dashboard(user, first, last)
+    if degraded:
+        ttl = DEGRADED_SOFT_TTL
+    else:
+        ttl = SNAPSHOT_TTL if last < current else DASHBOARD_SOFT_TTL
+    store(key, value, ttl, ttl)
+    return value
+
+
+def timeseries_key(user_id, generation, months, granularity, by_category, today=None):
+    """
+    Cache key for a trend series. The window moves daily, so the
+    date is part of the key.
+    """
+    today = today or date.today()
+    split = "cat" if by_category else "all"
+    return f"timeseries:{user_id}:g{generation}:{granularity}:{months}:{split}:{today:%Y-%m-%d}"
+
+
+def get_timeseries(user, months, granularity, by_category=False):
+    """
+    Return a trend series for `user`, cached per user generation.
+    """
+    key = timeseries_key(user.id, get_generation(user.id), months, granularity, by_category)
+    entry = _read_entry(key)
+    if entry is not None:
+        cache_reads.inc(section="timeseries", result="fresh")
+        return entry["value"]
+
+    cache_reads.inc(section="timeseries", result="miss")
+    value = build_timeseries(user, months, granularity, by_category)
+    store(key, value, DASHBOARD_SOFT_TTL, DASHBOARD_SOFT_TTL)
+    return value
+
+
+def refresh_for_user_id(section_name, user_id, token=None):
+    """
+    Celery entry point: refresh a section by user id, releasing the lock
+    held under `token`.
+    """
+    try:
+        user = User.objects.get(id=user_id)
+    except User.DoesNotExist:
+        _release_lock(SECTIONS[section_name].key(user_id), token)
+        return None
+
+    return refresh(section_name, user, token=token)
@@ -1,4 +1,32 @@
-from django.http import JsonResponse
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from core.metrics import render_prometheus
+
 
 def health_check(request):
     return JsonResponse({"status": "ok"})
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint for this worker's metrics.
+
+    Requires `Authorization: Bearer <METRICS_TOKEN>`. Without that
+    setting the endpoint is closed (403) unless DEBUG is on.
+
+    The registry is per process (core.metrics): each scrape returns the
+    counters of whichever worker served it. Scrape every worker (e.g. a
+    sidecar per process) and aggregate in Prometheus; a load-balanced
+    scrape sees a different subset each time.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
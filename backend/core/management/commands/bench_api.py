@@ -0,0 +1,93 @@
+"""
+Run the API hot-path benchmark suite (benchmarks.suite).
+
+The suite runs against a throwaway test database (in-memory on SQLite)
+and, unless --configured-cache is given, a local memory cache, so it
+never touches real data and results are reproducible.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from benchmarks.suite import compare, run_benchmarks
+
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark dashboard, alerts, transactions and auth endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--transactions", type=int, default=1000, help="Per user.")
+        parser.add_argument("--budgets", type=int, default=5, help="Per user.")
+        parser.add_argument("--goals", type=int, default=3, help="Per user.")
+        parser.add_argument("--iterations", type=int, default=50, help="Requests per scenario and cache mode.")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--scenario", action="append", dest="scenarios",
+            help="Only run this scenario (repeatable).",
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--compare", help="Compare against an earlier JSON report.")
+        parser.add_argument(
+            "--configured-cache", action="store_true",
+            help="Use settings.CACHES (e.g. Redis) instead of a local memory cache.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as handle:
+                    baseline = json.load(handle)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline report: {exc}")
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            caches = override_settings() if options["configured_cache"] else override_settings(CACHES=LOCMEM_CACHES)
+            with caches:
+                report = run_benchmarks(
+                    users=options["users"],
+                    transactions=options["transactions"],
+                    budgets=options["budgets"],
+                    goals=options["goals"],
+                    iterations=options["iterations"],
+                    scenarios=options["scenarios"],
+                    seed=options["seed"],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'scenario':<22}{'cache':<7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+        for r in report["results"]:
+            self.stdout.write(
+                f"{r['scenario']:<22}{r['cache']:<7}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+                f"{r['p99_ms']:>10.2f}{r['queries']['mean']:>9}"
+            )
+
+        if baseline is not None:
+            self.stdout.write("\nvs baseline (ratio < 1 is faster)")
+            for scenario, cache_mode, p50, p95, queries in compare(baseline, report):
+                self.stdout.write(
+                    f"{scenario:<22}{cache_mode:<7}"
+                    f"{'n/a' if p50 is None else f'{p50:.2f}x':>10}"
+                    f"{'n/a' if p95 is None else f'{p95:.2f}x':>10}"
+                    f"{queries:>+9}"
+                )
+
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
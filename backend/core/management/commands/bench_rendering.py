@@ -0,0 +1,76 @@
+"""
+Benchmark JSON rendering and compression of a transaction list.
+
+Compares DRF's JSONRenderer with core.renderers.ORJSONRenderer on a
+page of serialized transactions (no database access), and reports the
+payload size raw, gzipped and brotli-compressed (if installed).
+"""
+
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.middleware import brotli, compress
+from core.models import Transaction
+from core.renderers import ORJSONRenderer
+from core.serializers import TransactionSerializer
+
+
+CATEGORIES = ["Food", "Rent", "Travel", "Utilities", "Shopping", "Health"]
+
+
+def sample_payload(rows):
+    """
+    Returns a transaction list response body with `rows` entries.
+    """
+    start = date.today()
+    transactions = [
+        Transaction(
+            type="income" if i % 10 == 0 else "expense",
+            category=CATEGORIES[i % len(CATEGORIES)],
+            amount=Decimal(i % 5000) + Decimal("0.99"),
+            date=start - timedelta(days=i % 365),
+            note=f"Sample transaction {i}",
+        )
+        for i in range(rows)
+    ]
+    return {"next": None, "results": TransactionSerializer(transactions, many=True).data}
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = "Compare DRF JSONRenderer and ORJSONRenderer on a transaction list."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Transactions in the list.")
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per renderer (best is kept).")
+
+    def handle(self, *args, **options):
+        payload = sample_payload(options["rows"])
+
+        for name, renderer in (("drf-json", JSONRenderer()), ("orjson", ORJSONRenderer())):
+            seconds = best_of(options["repeat"], lambda: renderer.render(payload))
+            self.stdout.write(f"{name:<10} render={seconds * 1000:8.2f} ms")
+
+        body = ORJSONRenderer().render(payload)
+        self.stdout.write(f"{'raw':<10} size={len(body):>10,} bytes")
+
+        encodings = ["gzip"] + (["br"] if brotli is not None else [])
+        for encoding in encodings:
+            compressed = []
+            seconds = best_of(3, lambda: compressed.append(compress(body, encoding)))
+            self.stdout.write(
+                f"{encoding:<10} size={len(compressed[-1]):>10,} bytes "
+                f"({len(compressed[-1]) / len(body):.1%}, {seconds * 1000:.2f} ms)"
+            )
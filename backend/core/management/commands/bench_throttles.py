@@ -0,0 +1,134 @@
+"""
+Benchmark throttle decisions.
+
+Compares DRF's UserRateThrottle (timestamp list in the cache) with
+core.throttles.UserRateThrottle (GCRA) on the configured cache:
+
+- cost per check as the request history grows (DRF loads and rewrites
+  one timestamp per request in the window; GCRA one number)
+- requests let through when threads race on a single key
+
+Unless --configured-cache is given both run on a local memory cache
+(GCRA then uses its in-process store); with it, on settings.CACHES,
+i.e. Redis in production settings.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.throttling import UserRateThrottle as DRFUserRateThrottle
+
+from core import throttles
+
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+
+def make_request(user_id):
+    """
+    Minimal stand-in for a DRF request from an authenticated user.
+    """
+    return SimpleNamespace(
+        user=SimpleNamespace(pk=user_id, is_authenticated=True),
+        META={"REMOTE_ADDR": "127.0.0.1"},
+    )
+
+
+def throttle_class(base, rate):
+    return type(f"Bench{base.__name__}", (base,), {"rate": rate, "scope": "bench"})
+
+
+def reset(user_id):
+    cache.delete_many([
+        DRFUserRateThrottle.cache_format % {"scope": "bench", "ident": user_id},
+        throttles.GCRAThrottle.cache_format % {"scope": "bench", "ident": user_id},
+    ])
+    throttles.local_store.clear()
+
+
+def time_checks(throttle_cls, requests, user_id):
+    """
+    Returns seconds per check for the first and the last 10% of
+    `requests` consecutive checks on one key.
+    """
+    reset(user_id)
+    request = make_request(user_id)
+    timings = []
+    for _ in range(requests):
+        throttle = throttle_cls()
+        started = time.perf_counter()
+        throttle.allow_request(request, None)
+        timings.append(time.perf_counter() - started)
+
+    tenth = max(1, requests // 10)
+    return sum(timings[:tenth]) / tenth, sum(timings[-tenth:]) / tenth
+
+
+def race(throttle_cls, threads, per_thread, user_id):
+    """
+    Returns how many of threads * per_thread concurrent checks on one
+    key were allowed.
+    """
+    reset(user_id)
+    request = make_request(user_id)
+    allowed = []
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        barrier.wait()
+        allowed.append(sum(throttle_cls().allow_request(request, None) for _ in range(per_thread)))
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return sum(allowed)
+
+
+class Command(BaseCommand):
+    help = "Compare DRF's list-based throttle with the GCRA throttle."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Checks per key (also the rate limit).")
+        parser.add_argument("--threads", type=int, default=8, help="Threads in the race test.")
+        parser.add_argument("--limit", type=int, default=100, help="Rate limit (per minute) in the race test.")
+        parser.add_argument(
+            "--configured-cache", action="store_true",
+            help="Use settings.CACHES (e.g. Redis) instead of a local memory cache.",
+        )
+
+    def handle(self, *args, **options):
+        caches = override_settings() if options["configured_cache"] else override_settings(CACHES=LOCMEM_CACHES)
+        with caches:
+            self.run(options)
+
+    def run(self, options):
+        requests = options["requests"]
+        contenders = (("drf-list", DRFUserRateThrottle), ("gcra", throttles.UserRateThrottle))
+
+        self.stdout.write(f"cache: {settings.CACHES['default']['BACKEND']}; {requests} checks at {requests}/day")
+        for user_id, (name, base) in enumerate(contenders, start=1):
+            first, last = time_checks(throttle_class(base, f"{requests}/day"), requests, user_id)
+            self.stdout.write(
+                f"{name:<10} first={first * 1e6:8.1f} us  last={last * 1e6:8.1f} us"
+            )
+
+        threads, limit = options["threads"], options["limit"]
+        per_thread = 2 * limit // threads + 1
+        self.stdout.write(f"race: {threads} threads x {per_thread} checks at {limit}/min")
+        for user_id, (name, base) in enumerate(contenders, start=1):
+            allowed = race(throttle_class(base, f"{limit}/min"), threads, per_thread, user_id)
+            self.stdout.write(f"{name:<10} allowed={allowed} (limit {limit})")
+
+        for user_id in range(1, len(contenders) + 1):
+            reset(user_id)
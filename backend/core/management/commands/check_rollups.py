@@ -0,0 +1,60 @@
+"""
+Verify monthly category rollups against raw transactions.
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.rollups import check_rollups, rebuild_rollups
+from .rebuild_rollups import parse_month
+
+
+class Command(BaseCommand):
+    help = "Report MonthlyCategoryRollup rows that drift from raw transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only check rollups for this user id.",
+        )
+        parser.add_argument(
+            "--month",
+            type=parse_month,
+            help="Only check rollups for this month (YYYY-MM).",
+        )
+        parser.add_argument(
+            "--repair",
+            action="store_true",
+            help="Rebuild rollups for every user with drift.",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"] is not None:
+            try:
+                user = User.objects.get(id=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+
+        mismatches = check_rollups(user, options["month"])
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Rollups are consistent."))
+            return
+
+        for m in mismatches:
+            self.stdout.write(
+                f"user={m['user_id']} month={m['month']:%Y-%m} "
+                f"type={m['type']} category={m['category']} "
+                f"expected={m['expected']} actual={m['actual']}"
+            )
+
+        if options["repair"]:
+            for user_id in sorted({m["user_id"] for m in mismatches}):
+                rebuild_rollups(User.objects.get(id=user_id), options["month"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Repaired {len(mismatches)} drifted buckets."
+            ))
+            return
+
+        raise CommandError(f"{len(mismatches)} rollup buckets drifted.")
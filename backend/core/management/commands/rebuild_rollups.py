@@ -0,0 +1,41 @@
+"""
+Backfill or repair monthly category rollups from raw transactions.
+"""
+
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.rollups import rebuild_rollups
+
+
+def parse_month(value):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+class Command(BaseCommand):
+    help = "Rebuild MonthlyCategoryRollup rows from raw transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            help="Only rebuild rollups for this user id.",
+        )
+        parser.add_argument(
+            "--month",
+            type=parse_month,
+            help="Only rebuild rollups for this month (YYYY-MM).",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"] is not None:
+            try:
+                user = User.objects.get(id=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist.")
+
+        written = rebuild_rollups(user, options["month"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup rows."))
@@ -0,0 +1,166 @@
+"""
+In-process metrics registry.
+
+Purpose:
+- Cheap counters and histograms for hot paths (cache, ML adapter, ...)
+- No external dependency; safe to leave enabled in production
+- Snapshots are per worker process
+
+Metrics are identified by name plus an optional set of labels.
+render_prometheus() serializes the registry in the Prometheus text
+exposition format (served on /metrics, see core.health).
+"""
+
+import bisect
+import threading
+
+
+# Latency buckets in seconds (Prometheus-style upper bounds)
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_lock = threading.Lock()
+_registry = {}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Counter:
+    """
+    Monotonically increasing value per label set.
+    """
+    kind = "counter"
+
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram:
+    """
+    Bucketed distribution (count, sum, cumulative buckets) per label set.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def count(self, **labels):
+        series = self._values.get(_label_key(labels))
+        return series["count"] if series else 0
+
+    def samples(self):
+        with self._lock:
+            return {
+                key: {
+                    "counts": list(series["counts"]),
+                    "sum": series["sum"],
+                    "count": series["count"],
+                }
+                for key, series in self._values.items()
+            }
+
+
+def _get_or_create(cls, name, *args, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name, help_text=""):
+    """
+    Returns the registered counter `name`, creating it on first use.
+    """
+    return _get_or_create(Counter, name, help_text)
+
+
+def histogram(name, help_text="", buckets=DEFAULT_BUCKETS):
+    """
+    Returns the registered histogram `name`, creating it on first use.
+    """
+    return _get_or_create(Histogram, name, help_text, buckets=buckets)
+
+
+def all_metrics():
+    """
+    Returns registered metrics sorted by name.
+    """
+    with _lock:
+        return [_registry[name] for name in sorted(_registry)]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render_prometheus():
+    """
+    Returns every registered metric in Prometheus text format.
+    """
+    lines = []
+    for metric in all_metrics():
+        lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+        samples = metric.samples()
+        if metric.kind == "counter":
+            for key, value in sorted(samples.items()):
+                lines.append(f"{metric.name}{_labels(key)} {value}")
+            continue
+
+        for key, series in sorted(samples.items()):
+            cumulative = 0
+            for bound, count in zip(metric.buckets, series["counts"]):
+                cumulative += count
+                lines.append(f"{metric.name}_bucket{_labels(key, [('le', format(bound, 'g'))])} {cumulative}")
+            lines.append(f"{metric.name}_bucket{_labels(key, [('le', '+Inf')])} {series['count']}")
+            lines.append(f"{metric.name}_sum{_labels(key)} {series['sum']}")
+            lines.append(f"{metric.name}_count{_labels(key)} {series['count']}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,186 @@
+"""
+HTTP middleware.
+
+Purpose:
+- Compress API responses (brotli when available, otherwise gzip)
+- Per-request latency histograms and Server-Timing header (DEBUG or
+  SERVER_TIMING only)
+- RateLimit-* headers for throttled endpoints (core.throttles)
+
+Only bodies of at least COMPRESSION_MIN_SIZE bytes are compressed:
+below that the framing overhead outweighs the savings. Paths in
+COMPRESSION_EXCLUDE_PREFIXES (auth endpoints returning tokens) are never
+compressed, so secrets are not exposed to BREACH-style length oracles.
+"""
+
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+from core import instrumentation, metrics
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+DEFAULT_MIN_SIZE = 1024
+BROTLI_QUALITY = 4
+
+ACCEPTS_BROTLI = re.compile(r"\bbr\b")
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+
+def select_encoding(accept_encoding):
+    """
+    Returns "br", "gzip" or None for an Accept-Encoding header.
+    """
+    if brotli is not None and ACCEPTS_BROTLI.search(accept_encoding):
+        return "br"
+    if ACCEPTS_GZIP.search(accept_encoding):
+        return "gzip"
+    return None
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return compress_string(content)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress responses with brotli or gzip above a size threshold.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+
+        min_size = getattr(settings, "COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE)
+        if len(response.content) < min_size:
+            return response
+
+        excluded = getattr(settings, "COMPRESSION_EXCLUDE_PREFIXES", ())
+        if request.path.startswith(tuple(excluded)):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = select_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+
+        # The encoded body differs byte-for-byte: strong ETags must become weak
+        if response.has_header("ETag"):
+            response.headers["ETag"] = re.sub(r'^"', 'W/"', response["ETag"])
+
+        return response
+
+
+# Query-count buckets for the per-request DB histogram
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_seconds = metrics.histogram(
+    "http_request_seconds",
+    "Request latency by route and method."
+)
+request_db_seconds = metrics.histogram(
+    "http_request_db_seconds",
+    "Time spent in database queries per request, by route."
+)
+request_db_queries = metrics.histogram(
+    "http_request_db_queries",
+    "Database queries per request, by route.",
+    buckets=QUERY_BUCKETS
+)
+request_cache_seconds = metrics.histogram(
+    "http_request_cache_seconds",
+    "Time spent in cache calls per request, by route."
+)
+
+
+def _time_queries(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        instrumentation.record("db", time.perf_counter() - started)
+
+
+class ServerTimingMiddleware:
+    """
+    Times each request and its DB / cache / ML work.
+
+    Observes per-route histograms. Routes are URL patterns, not paths,
+    so label cardinality stays bounded.
+
+    The Server-Timing header (db, cache, ml, view, total) reveals query
+    counts and timings to the client, so it is only added with DEBUG or
+    the SERVER_TIMING setting on.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+
+        with instrumentation.request_scope() as timings, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_time_queries))
+            response = self.get_response(request)
+
+        total = time.perf_counter() - started
+        view_started = getattr(request, "_view_started", None)
+        view = total if view_started is None else time.perf_counter() - view_started
+
+        if settings.DEBUG or getattr(settings, "SERVER_TIMING", False):
+            response["Server-Timing"] = timings.server_timing(view=view, total=total)
+
+        match = request.resolver_match
+        route = match.route if match else "unmatched"
+        request_seconds.observe(total, route=route, method=request.method)
+        request_db_seconds.observe(timings.durations["db"], route=route)
+        request_db_queries.observe(timings.counts["db"], route=route)
+        request_cache_seconds.observe(timings.durations["cache"], route=route)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Adds RateLimit-* headers from the most restrictive throttle that
+    checked the request (set by core.throttles.GCRAThrottle).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        ratelimit = getattr(request, "_ratelimit", None)
+        if ratelimit is not None:
+            for name, value in ratelimit.headers().items():
+                response[name] = value
+
+        return response
@@ -5,6 +5,7 @@ Includes:
 - Transaction
 - Budget
 - Goal
+- MonthlyCategoryRollup (derived, maintained on write)
 """
 
 from django.conf import settings
@@ -59,6 +60,15 @@ class Transaction(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Services filter by user plus a half-open date range, optionally
+        # narrowed by type or category (see core.services.periods)
+        indexes = [
+            models.Index(fields=["user", "date"], name="tx_user_date_idx"),
+            models.Index(fields=["user", "type", "date"], name="tx_user_type_date_idx"),
+            models.Index(fields=["user", "category", "date"], name="tx_user_category_date_idx"),
+        ]
+
     def __str__(self):
         return f"{self.type} - {self.amount}"
 
@@ -128,3 +138,53 @@ class Goal(models.Model):
 
     def __str__(self):
         return f"Goal({self.name})"
+
+
+#ROLLUPS
+class MonthlyCategoryRollup(models.Model):
+    """
+    Pre-aggregated transaction totals per user, month, type and category.
+
+    Derived data: maintained in the same DB transaction as every
+    Transaction insert and rebuildable at any time from raw rows
+    (see core.services.rollups).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_rollups"
+    )
+
+    # First day of the month this bucket covers
+    month = models.DateField()
+
+    type = models.CharField(
+        max_length=10,
+        choices=Transaction.TRANSACTION_TYPES
+    )
+
+    category = models.CharField(
+        max_length=100
+    )
+
+    # Running sum of transaction amounts in this bucket
+    total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0
+    )
+
+    # Number of transactions folded into this bucket
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "month", "type", "category"],
+                name="unique_monthly_category_rollup",
+            )
+        ]
+
+    def __str__(self):
+        return f"Rollup({self.month:%Y-%m} {self.type} {self.category} - {self.total})"
@@ -0,0 +1,125 @@
+"""
+Keyset (seek) pagination for list endpoints.
+
+Unlike offset pagination, each page is fetched with a
+`WHERE (key, id) < (last_key, last_id)` predicate on an indexed,
+stable ordering, so page 500 costs the same as page 1.
+"""
+
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginates on (ordering_field, id) using an opaque cursor.
+
+    Subclasses set `ordering_field`; prefix with "-" for newest first.
+    `id` is always the tie-breaker so ordering is total and stable.
+    Rows may be model instances or named values_list rows.
+    """
+    ordering_field = "-created_at"
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.descending = self.ordering_field.startswith("-")
+        self.field = self.ordering_field.lstrip("-")
+        self.next_position = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            value = model._meta.get_field(self.field).to_python(value)
+            pk = int(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+        return value, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        if self.descending:
+            queryset = queryset.order_by(f"-{self.field}", "-id")
+        else:
+            queryset = queryset.order_by(self.field, "id")
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            value, pk = position
+            op = "lt" if self.descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{op}": value})
+                | Q(**{self.field: value, f"id__{op}": pk})
+            )
+
+        # One extra row tells us whether another page exists
+        page = list(queryset[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            value = getattr(last, self.field)
+            self.next_position = [
+                value.isoformat() if hasattr(value, "isoformat") else value,
+                last.id,
+            ]
+        else:
+            self.next_position = None
+
+        return page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data,
+        })
+
+
+class TransactionPagination(KeysetPagination):
+    ordering_field = "-date"
+
+
+class BudgetPagination(KeysetPagination):
+    ordering_field = "-start_date"
+
+
+class GoalPagination(KeysetPagination):
+    ordering_field = "deadline"
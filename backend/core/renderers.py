@@ -0,0 +1,51 @@
+"""
+orjson-based DRF renderer and parser.
+
+Purpose:
+- Faster JSON encoding/decoding for every API response and request body
+- Output-compatible with DRF's JSONRenderer (compact, UTF-8, Decimal
+  as number, aware UTC datetimes with a "Z" suffix)
+
+orjson encodes dict/list/str/int/float/date/datetime/UUID natively;
+anything else (Decimal, lazy strings, querysets, ...) goes through
+DRF's own encoder hook so the fallback rules stay identical.
+"""
+
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_fallback = JSONEncoder().default
+
+
+class ORJSONRenderer(BaseRenderer):
+    """
+    Renders data to JSON with orjson.
+    """
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=_fallback, option=OPTIONS)
+
+
+class ORJSONParser(BaseParser):
+    """
+    Parses JSON request bodies with orjson.
+    """
+    media_type = "application/json"
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -4,6 +4,8 @@ Serializers for core financial models.
 
 from rest_framework import serializers
 from .models import Transaction, Budget, Goal
+from .services.periods import month_span
+from .services.timeseries import MAX_MONTHS, MONTH
 
 
 class TransactionSerializer(serializers.ModelSerializer):
@@ -29,6 +31,92 @@ class TransactionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Amount must be greater than zero.")
         return value
 
+class TransactionRows:
+    """
+    Read-only fast path for listing transactions.
+
+    Produces exactly what TransactionSerializer(many=True).data renders,
+    but from values_list rows: no model instances are built and the
+    serializer field tree is created once, not walked per row. Each
+    column still goes through the serializer field's to_representation,
+    so formatting (e.g. Decimal quantization) cannot drift.
+
+    `fields` limits the output to a subset of TransactionSerializer's
+    fields (sparse fieldsets), in serializer order.
+    """
+
+    ROWS = "rows"
+    COLUMNAR = "columnar"
+
+    def __init__(self, fields=None):
+        serializer_fields = TransactionSerializer().fields
+        self.fields = [name for name in serializer_fields if fields is None or name in fields]
+
+        # id and date are always fetched: keyset pagination reads them
+        self.columns = ["id", "date"] + [name for name in self.fields if name != "date"]
+        self.converters = [
+            (name, self.columns.index(name), serializer_fields[name].to_representation)
+            for name in self.fields
+        ]
+
+    def queryset(self, transactions):
+        """
+        Returns `transactions` as named values_list rows.
+        """
+        return transactions.values_list(*self.columns, named=True)
+
+    def to_rows(self, page):
+        return [
+            {
+                name: None if row[index] is None else convert(row[index])
+                for name, index, convert in self.converters
+            }
+            for row in page
+        ]
+
+    def to_columns(self, page):
+        return {
+            name: [None if row[index] is None else convert(row[index]) for row in page]
+            for name, index, convert in self.converters
+        }
+
+    def render(self, page, layout=ROWS):
+        """
+        Returns a list of dicts, or {field: [values]} for COLUMNAR.
+        """
+        if layout == self.COLUMNAR:
+            return self.to_columns(page)
+        return self.to_rows(page)
+
+
+class TransactionLayoutSerializer(serializers.Serializer):
+    """
+    Validates transaction list output parameters.
+
+    - fields: comma-separated subset of transaction fields
+    - layout: "rows" (default, list of objects) or "columnar"
+      ({field: [values]}, smaller for large pages)
+    """
+
+    fields = serializers.CharField(required=False)
+    layout = serializers.ChoiceField(
+        choices=[TransactionRows.ROWS, TransactionRows.COLUMNAR],
+        required=False,
+        default=TransactionRows.ROWS
+    )
+
+    def validate_fields(self, value):
+        names = [name.strip() for name in value.split(",") if name.strip()]
+        allowed = TransactionSerializer.Meta.fields
+
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}.")
+        if not names:
+            raise serializers.ValidationError("Select at least one field.")
+        return names
+
+
 class BudgetSerializer(serializers.ModelSerializer):
     """
     Serializer for budget validation.
@@ -91,3 +179,125 @@ class GoalSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Saved amount cannot be negative.")
         return value
 
+
+class TransactionFilterSerializer(serializers.Serializer):
+    """
+    Validates transaction list query parameters.
+
+    Every filter maps to a plain range or equality predicate so it can
+    be served from the (user, ...) indexes.
+    """
+
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    type = serializers.ChoiceField(
+        choices=Transaction.TRANSACTION_TYPES,
+        required=False
+    )
+    category = serializers.CharField(max_length=100, required=False)
+    min_amount = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        required=False
+    )
+    max_amount = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        required=False
+    )
+
+    LOOKUPS = {
+        "date_from": "date__gte",
+        "date_to": "date__lte",
+        "type": "type",
+        "category": "category",
+        "min_amount": "amount__gte",
+        "max_amount": "amount__lte",
+    }
+
+    def validate(self, data):
+        """
+        Ensure ranges are not inverted.
+        """
+        if "date_from" in data and "date_to" in data and data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError("date_from must be on or before date_to.")
+        if "min_amount" in data and "max_amount" in data and data["min_amount"] > data["max_amount"]:
+            raise serializers.ValidationError("min_amount must not exceed max_amount.")
+        return data
+
+    def filter_queryset(self, queryset):
+        """
+        Apply validated filters to a transaction queryset.
+        """
+        return queryset.filter(**{
+            self.LOOKUPS[name]: value
+            for name, value in self.validated_data.items()
+        })
+
+
+class DashboardPeriodSerializer(serializers.Serializer):
+    """
+    Validates dashboard period query parameters.
+
+    Either `month=YYYY-MM`, or `from=YYYY-MM&to=YYYY-MM` (inclusive).
+    Periods are whole months: the dashboard is served from monthly rollups.
+    """
+
+    MAX_MONTHS = 24
+
+    month = serializers.DateField(input_formats=["%Y-%m"], required=False)
+
+    def get_fields(self):
+        # "from" is a Python keyword, so it cannot be a class attribute
+        fields = super().get_fields()
+        fields["from"] = serializers.DateField(input_formats=["%Y-%m"], required=False)
+        fields["to"] = serializers.DateField(input_formats=["%Y-%m"], required=False)
+        return fields
+
+    def validate(self, data):
+        """
+        Resolve the parameters to a (first, last) month pair.
+        """
+        first, last = data.get("from"), data.get("to")
+
+        if "month" in data:
+            if first or last:
+                raise serializers.ValidationError("Use either month or from/to, not both.")
+            return {"first": data["month"], "last": data["month"]}
+
+        if not first and not last:
+            return {"first": None, "last": None}
+        if not first or not last:
+            raise serializers.ValidationError("from and to must be given together.")
+        if first > last:
+            raise serializers.ValidationError("from must be on or before to.")
+        if month_span(first, last) > self.MAX_MONTHS:
+            raise serializers.ValidationError(
+                f"A period can span at most {self.MAX_MONTHS} months."
+            )
+        return {"first": first, "last": last}
+
+
+class TimeseriesQuerySerializer(serializers.Serializer):
+    """
+    Validates time-series query parameters.
+    """
+
+    months = serializers.IntegerField(min_value=1, required=False, default=12)
+    granularity = serializers.ChoiceField(
+        choices=list(MAX_MONTHS),
+        required=False,
+        default=MONTH
+    )
+    by_category = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, data):
+        """
+        Bound the number of buckets per granularity.
+        """
+        limit = MAX_MONTHS[data["granularity"]]
+        if data["months"] > limit:
+            raise serializers.ValidationError(
+                f"{data['granularity']} series can span at most {limit} months."
+            )
+        return data
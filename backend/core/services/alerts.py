@@ -4,137 +4,212 @@ Rule-based alerts engine.
 Purpose:
 - Detect risky financial behavior
 - Generate human-readable alerts
+
+All rules are evaluated in memory from a single windowed query over
+the last WINDOW_MONTHS months of rollups (conditional aggregation by
+month and type) plus one query evaluating the active budgets over their
+own date ranges (core.services.budgets), so the query count does not
+depend on the number of budgets or rules.
+
+The rules and the ML call are independent: build_alerts starts the ML
+call in an I/O thread, evaluates the rules meanwhile, and waits for ML
+until ML_SECTION_TIMEOUT after it started (alerts are then served
+without ML insights).
 """
 
+from collections import defaultdict
 from datetime import date
-from django.db.models import Sum
+from decimal import Decimal
+from django.db.models import Q, Sum
+
+from core.models import MonthlyCategoryRollup
+from core.services.budgets import AT_RISK, EXCEEDED, evaluate_budget, evaluated_budgets
+from core.services.ml_adapter import fetch_ml_insights
+from core.services.periods import month_start, shift_month
+from core.services.sections import finish_section, run_section, start_section
+
 
-from core.models import Transaction, Budget
+# Current month plus the three months used for the unusual-spending average
+WINDOW_MONTHS = 4
 
+# Seconds the alerts payload waits for ML insights
+ML_SECTION_TIMEOUT = 1.5
 
-def budget_overuse_alerts(user):
+
+def window_months(today=None):
     """
-    Detect budget overuse for the current month.
+    Returns month starts for the alert window, newest first.
     """
-    alerts = []
-    today = date.today()
+    current = month_start(today or date.today())
+    return [shift_month(current, -i) for i in range(WINDOW_MONTHS)]
 
-    budgets = Budget.objects.filter(user=user)
-    for budget in budgets:
-        spent = (
-            Transaction.objects.filter(
-                user=user,
-                type="expense",
-                category=budget.category,
-                date__year=today.year,
-                date__month=today.month
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
+
+def _empty_window():
+    return {
+        "income": [Decimal("0")] * WINDOW_MONTHS,
+        "expense": [Decimal("0")] * WINDOW_MONTHS,
+    }
+
+
+def load_alert_windows(user_ids, today=None):
+    """
+    Load per-user monthly totals for the alert window in one query.
+
+    Returns {user_id: window}, where a window holds:
+    - income / expense: totals per month, index 0 = current month
+    Users without data get an all-zero window.
+    """
+    months = window_months(today)
+
+    rows = (
+        MonthlyCategoryRollup.objects
+        .filter(
+            user_id__in=user_ids,
+            month__gte=months[-1],
+            month__lte=months[0]
         )
+        .values("user_id", "type")
+        .annotate(**{
+            f"m{i}": Sum("total", filter=Q(month=month))
+            for i, month in enumerate(months)
+        })
+        .order_by()
+    )
 
-        if spent > budget.limit_amount:
+    windows = {user_id: _empty_window() for user_id in user_ids}
+    for row in rows:
+        window = windows[row["user_id"]]
+        totals = window[row["type"]]
+
+        for i in range(WINDOW_MONTHS):
+            totals[i] += row[f"m{i}"] or Decimal("0")
+
+    return windows
+
+
+def load_active_budgets(user_ids, today=None):
+    """
+    Load the budgets active on `today`, evaluated over their own date
+    ranges, in one query. Returns {user_id: [budget]}.
+    """
+    budgets = defaultdict(list)
+    for budget in evaluated_budgets(user_ids, active_on=today or date.today()):
+        budgets[budget.user_id].append(budget)
+    return budgets
+
+
+def budget_overuse_alerts(budgets, today=None):
+    """
+    Detect budgets that are exceeded, or on pace to be, within their range.
+    """
+    alerts = []
+
+    for budget in budgets:
+        status = evaluate_budget(budget, today)["status"]
+        start, end = budget.start_date, budget.end_date
+
+        if status == EXCEEDED:
+            if (start.year, start.month) == (end.year, end.month):
+                period = "this month"
+            else:
+                period = f"{start:%b %d} to {end:%b %d}"
+            alerts.append(f"You have exceeded your {budget.category} budget for {period}.")
+        elif status == AT_RISK:
             alerts.append(
-                f"You have exceeded your {budget.category} budget for this month."
+                f"At your current pace you will exceed your {budget.category} "
+                f"budget before {end:%b %d}."
             )
 
     return alerts
 
 
-def low_savings_alert(user):
+def low_savings_alert(window):
     """
     Alert if savings rate is low.
     """
-    today = date.today()
-
-    income = (
-        Transaction.objects.filter(
-            user=user,
-            type="income",
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum("amount"))["total"]
-        or 0
-    )
-
-    expense = (
-        Transaction.objects.filter(
-            user=user,
-            type="expense",
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum("amount"))["total"]
-        or 0
-    )
+    income = window["income"][0]
+    expense = window["expense"][0]
 
     if income == 0:
         return None
 
     savings_rate = (income - expense) / income
 
-    if savings_rate < 0.10:
+    if savings_rate < Decimal("0.10"):
         return "Your savings rate is low this month. Consider reducing discretionary spending."
 
     return None
 
 
-def unusual_spending_alert(user):
+def unusual_spending_alert(window):
     """
     Detect unusually high spending compared to last 3 months average.
     """
-    today = date.today()
-
-    current = (
-        Transaction.objects.filter(
-            user=user,
-            type="expense",
-            date__year=today.year,
-            date__month=today.month
-        ).aggregate(total=Sum("amount"))["total"]
-        or 0
-    )
-
-    past_totals = []
-    for i in range(1, 4):
-        prev_month = today.replace(day=1)
-        prev_month = prev_month.replace(month=prev_month.month - i if prev_month.month > i else 12)
-
-        total = (
-            Transaction.objects.filter(
-                user=user,
-                type="expense",
-                date__year=prev_month.year,
-                date__month=prev_month.month
-            ).aggregate(total=Sum("amount"))["total"]
-            or 0
-        )
-        if total:
-            past_totals.append(total)
+    current = window["expense"][0]
+    past_totals = [total for total in window["expense"][1:] if total]
 
     if not past_totals:
         return None
 
     average = sum(past_totals) / len(past_totals)
 
-    if current > average * 1.3:
+    if current > average * Decimal("1.3"):
         return "Your spending this month is unusually high compared to previous months."
 
     return None
 
 
-def generate_rule_based_alerts(user):
+def evaluate_rules(window, budgets, today=None):
     """
-    Aggregate all rule-based alerts.
+    Evaluate every rule against an in-memory window and the user's
+    evaluated active budgets.
     """
     alerts = []
 
-    alerts.extend(budget_overuse_alerts(user))
+    alerts.extend(budget_overuse_alerts(budgets, today))
 
-    low_savings = low_savings_alert(user)
+    low_savings = low_savings_alert(window)
     if low_savings:
         alerts.append(low_savings)
 
-    unusual = unusual_spending_alert(user)
+    unusual = unusual_spending_alert(window)
     if unusual:
         alerts.append(unusual)
 
     return alerts
+
+
+def generate_rule_based_alerts(user):
+    """
+    Aggregate all rule-based alerts.
+    """
+    window = load_alert_windows([user.id])[user.id]
+    budgets = load_active_budgets([user.id])[user.id]
+
+    return evaluate_rules(window, budgets)
+
+
+def build_alerts(user):
+    """
+    Rule-based alerts followed by optional ML insights (AlertsView payload).
+    """
+    ml = start_section(fetch_ml_insights, user.id)
+    rules = run_section("rules", generate_rule_based_alerts, user, fallback=[])
+    return rules + finish_section("ml", ml, fallback=[], timeout=ML_SECTION_TIMEOUT)
+
+
+def generate_rule_based_alerts_for_users(user_ids, today=None):
+    """
+    Aggregate rule-based alerts for many users with set-based queries.
+
+    Issues two queries (alert windows + evaluated budgets) regardless
+    of how many users or budgets are in `user_ids`.
+    Returns {user_id: [alerts]}.
+    """
+    windows = load_alert_windows(user_ids, today)
+    budgets_by_user = load_active_budgets(user_ids, today)
+
+    return {
+        user_id: evaluate_rules(windows[user_id], budgets_by_user[user_id], today)
+        for user_id in user_ids
+    }
@@ -0,0 +1,128 @@
+"""
+Budget evaluation engine.
+
+Purpose:
+- Measure every budget against the expenses inside its own
+  start_date..end_date range (budgets may span several months and
+  may overlap each other)
+- Report utilization and project end-of-range spend from the pace so far
+
+Any number of budgets (of any number of users) is evaluated by one
+query: Budget LEFT JOINs its owner's expense transactions restricted
+to the budget's category and date range (FilteredRelation), grouped
+per budget. The join condition matches the (user, category, date)
+index on Transaction, so each budget only reads its own rows.
+
+Rollups cannot be used here: they are monthly, budget ranges are not.
+"""
+
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import DecimalField, F, FilteredRelation, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core.models import Budget, Transaction
+
+
+OK = "ok"
+AT_RISK = "at_risk"
+EXCEEDED = "exceeded"
+
+CENT = Decimal("0.01")
+
+# Days of a range that must have elapsed before spend is extrapolated;
+# earlier, a single purchase would project far past any limit
+PACE_MIN_DAYS = 3
+
+
+def evaluated_budgets(user_ids, overlapping=None, active_on=None, within=None):
+    """
+    Returns a lazy Budget queryset annotated with `spent`, the expense
+    total of the budget's category within its date range.
+
+    - overlapping: (first, last) dates; keep budgets whose range
+      intersects first..last
+    - active_on: keep budgets whose range contains this date
+    - within: (first, last) dates; only count transactions in first..last
+    """
+    in_range = Q(
+        user__transactions__type=Transaction.EXPENSE,
+        user__transactions__category=F("category"),
+        user__transactions__date__gte=F("start_date"),
+        user__transactions__date__lte=F("end_date"),
+    )
+    if within is not None:
+        first, last = within
+        in_range &= Q(user__transactions__date__gte=first, user__transactions__date__lte=last)
+
+    budgets = Budget.objects.filter(user_id__in=user_ids)
+    if overlapping is not None:
+        first, last = overlapping
+        budgets = budgets.filter(start_date__lte=last, end_date__gte=first)
+    if active_on is not None:
+        budgets = budgets.filter(start_date__lte=active_on, end_date__gte=active_on)
+
+    return (
+        budgets
+        .annotate(
+            expenses=FilteredRelation("user__transactions", condition=in_range),
+            spent=Coalesce(
+                Sum("expenses__amount"),
+                Value(Decimal("0")),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+        .order_by("user_id", "start_date", "id")
+    )
+
+
+def evaluate_budget(budget, today=None, since=None):
+    """
+    Utilization and pace of an evaluated budget (see evaluated_budgets)
+    as of `today`. Pass `since` when spend was only counted from that
+    date (evaluated_budgets(within=...)), so the pace uses the same days.
+
+    The projection extrapolates the average daily spend so far over the
+    whole range once PACE_MIN_DAYS have elapsed; until then, and once
+    the range has ended, it is the actual spend. A zero limit has no
+    utilization and any spend exceeds it.
+    """
+    today = today or date.today()
+    limit = budget.limit_amount
+    spent = budget.spent
+
+    days = (budget.end_date - budget.start_date).days + 1
+    elapsed = min(max((today - budget.start_date).days + 1, 0), days)
+
+    counted_from = max(budget.start_date, since) if since else budget.start_date
+    counted = min(max((today - counted_from).days + 1, 0), days)
+    if elapsed < days and counted >= PACE_MIN_DAYS:
+        projected = spent * days / counted
+    else:
+        projected = spent
+
+    if limit > 0:
+        utilization = float((spent / limit * 100).quantize(CENT, ROUND_HALF_UP))
+    else:
+        utilization = None
+
+    if spent > limit:
+        status = EXCEEDED
+    elif projected > limit:
+        status = AT_RISK
+    else:
+        status = OK
+
+    return {
+        "category": budget.category,
+        "start_date": budget.start_date.isoformat(),
+        "end_date": budget.end_date.isoformat(),
+        "limit": float(limit),
+        "spent": float(spent),
+        "utilization_percent": utilization,
+        "projected": float(projected.quantize(CENT, ROUND_HALF_UP)),
+        "days_elapsed": elapsed,
+        "days_total": days,
+        "status": status,
+    }
@@ -5,13 +5,32 @@ Purpose:
 - Compute financial summaries for dashboard
 - NO database writes
 - NO ML logic
+
+All month-scoped sections (totals, categories, insights) share a
+single MonthSummary built by one GROUP BY query, so a cache miss costs
+the same regardless of how many sections read it. Budgets are measured
+over their own date ranges by one query (core.services.budgets).
+
+The summary, budgets, goals and currency are independent reads built
+as isolated sections (core.services.sections): if one fails, its part
+of the payload falls back to an empty value (zeroed totals), the failed
+sections are listed under "degraded" and the rest is still returned.
 """
 
 from collections import defaultdict
-from django.db.models import Sum
-from datetime import date
+from decimal import Decimal
+from django.db.models import Q, Sum
+from datetime import date, timedelta
+
+from core.models import Goal, MonthlyCategoryRollup
+from core.services.budgets import evaluate_budget, evaluated_budgets
+from core.services.insights import generate_insights
+from core.services.periods import month_span, month_start, shift_month
+from core.services.sections import run_section, track_degraded
+from users.models import Profile
+
 
-from core.models import Transaction, Budget, Goal
+DEFAULT_CURRENCY = "INR"
 
 
 def get_current_month():
@@ -22,29 +41,86 @@ def get_current_month():
     return today.strftime("%Y-%m")
 
 
-def get_monthly_transactions(user):
+def aggregate_period(user, first, last):
     """
-    Fetch all transactions for the current month.
+    Aggregate the months `first`..`last` (inclusive) of rollups in a
+    single GROUP BY type, category query.
+
+    The expense of the equally long period right before is folded into
+    the same query via conditional aggregation so the spending-trend
+    insight needs no extra round trip.
+
+    Returns a dict:
+    - income / expense: Decimal totals for the period
+    - previous_expense: Decimal expense total for the period before
+    - previous_label: how insights refer to that period
+    - expense_by_category: {category: Decimal}
     """
-    today = date.today()
-    return Transaction.objects.filter(
-        user=user,
-        date__year=today.year,
-        date__month=today.month
+    rows, span = _period_rows(user, first, last)
+    return _summarize(rows, span)
+
+
+def _period_rows(user, first, last):
+    """
+    Returns the (lazy) rollup query for aggregate_period and the
+    period length in months.
+    """
+    first, last = month_start(first), month_start(last)
+    span = month_span(first, last)
+    previous_first = shift_month(first, -span)
+    previous_last = shift_month(first, -1)
+
+    rows = (
+        MonthlyCategoryRollup.objects
+        .filter(user=user, month__gte=previous_first, month__lte=last)
+        .values("type", "category")
+        .annotate(
+            current=Sum("total", filter=Q(month__gte=first)),
+            previous=Sum("total", filter=Q(month__lte=previous_last)),
+        )
+        .order_by()
     )
+    return rows, span
+
+
+def _summarize(rows, span):
+    summary = {
+        "income": Decimal("0"),
+        "expense": Decimal("0"),
+        "previous_expense": Decimal("0"),
+        "previous_label": "last month" if span == 1 else "the previous period",
+        "expense_by_category": defaultdict(Decimal),
+    }
+
+    for row in rows:
+        current = row["current"] or Decimal("0")
+
+        if row["type"] == "income":
+            summary["income"] += current
+            continue
+
+        summary["expense"] += current
+        summary["previous_expense"] += row["previous"] or Decimal("0")
+        if current:
+            summary["expense_by_category"][row["category"]] += current
 
+    return summary
 
-def calculate_totals(transactions):
+
+def aggregate_month(user, month=None):
     """
-    Calculate income, expense, and savings.
+    Aggregate one month of rollups (see aggregate_period).
     """
-    income = transactions.filter(type="income").aggregate(
-        total=Sum("amount")
-    )["total"] or 0
+    month = month or date.today()
+    return aggregate_period(user, month, month)
 
-    expense = transactions.filter(type="expense").aggregate(
-        total=Sum("amount")
-    )["total"] or 0
+
+def calculate_totals(summary):
+    """
+    Calculate income, expense, and savings.
+    """
+    income = summary["income"]
+    expense = summary["expense"]
 
     return {
         "income": income,
@@ -53,51 +129,63 @@ def calculate_totals(transactions):
     }
 
 
-def category_breakdown(transactions):
+def empty_totals():
     """
-    Group expenses by category.
+    Totals served when the summary could not be computed.
     """
-    category_map = defaultdict(float)
+    return {"income": Decimal("0"), "expense": Decimal("0"), "savings": Decimal("0")}
 
-    for tx in transactions.filter(type="expense"):
-        category_map[tx.category] += float(tx.amount)
 
+def category_breakdown(summary):
+    """
+    Group expenses by category.
+    """
     return [
-        {"category": k, "expense": v}
-        for k, v in category_map.items()
+        {"category": k, "expense": float(v)}
+        for k, v in summary["expense_by_category"].items()
     ]
 
 
-def budget_usage(user, transactions):
-    """
-    Compare budgets against actual spending.
+def budget_window(first, last, today=None):
     """
-    budgets = Budget.objects.filter(user=user)
-    expenses = defaultdict(float)
+    Returns ((first day, last day), within, as_of) for the budgets shown
+    with the months `first`..`last`.
 
-    for tx in transactions.filter(type="expense"):
-        expenses[tx.category] += float(tx.amount)
+    Closed periods only count spend inside the period and are evaluated
+    as of its last day: their snapshot key only covers the period's
+    months (see caching.period_key), so spend from earlier or later
+    months would go stale. Otherwise `within` and `as_of` are None.
+    """
+    today = today or date.today()
+    first_day = month_start(first)
+    last_day = shift_month(month_start(last), 1) - timedelta(days=1)
+    if last_day >= today:
+        return (first_day, last_day), None, None
+    return (first_day, last_day), (first_day, last_day), last_day
 
-    results = []
-    for budget in budgets:
-        spent = expenses.get(budget.category, 0)
-        status = "ok" if spent <= float(budget.limit_amount) else "exceeded"
 
-        results.append({
-            "category": budget.category,
-            "limit": float(budget.limit_amount),
-            "spent": spent,
-            "status": status
-        })
+def budget_usage(user, first=None, last=None, budgets=None):
+    """
+    Utilization and pace of the budgets overlapping the months
+    `first`..`last` (default: the current month).
+    `budgets` may be passed in when already loaded.
+    """
+    first = first or date.today()
+    overlapping, within, as_of = budget_window(first, last or first)
+    if budgets is None:
+        budgets = evaluated_budgets([user.id], overlapping=overlapping, within=within)
 
-    return results
+    since = within[0] if within else None
+    return [evaluate_budget(budget, as_of, since) for budget in budgets]
 
 
-def goal_progress(user):
+def goal_progress(user, goals=None):
     """
     Calculate progress percentage for goals.
+    `goals` may be passed in when already loaded.
     """
-    goals = Goal.objects.filter(user=user)
+    if goals is None:
+        goals = Goal.objects.filter(user=user)
 
     results = []
     for goal in goals:
@@ -114,3 +202,74 @@ def goal_progress(user):
         })
 
     return results
+
+
+def _attached_currency(user):
+    """
+    Currency from a profile already attached to `user` (e.g. by
+    authn.CachedJWTAuthentication), or None if none is attached.
+    """
+    relation = Profile._meta.get_field("user").remote_field
+    if not relation.is_cached(user):
+        return None
+    profile = relation.get_cached_value(user)
+    return profile.currency if profile is not None else DEFAULT_CURRENCY
+
+
+def get_currency(user):
+    """
+    Returns the user's preferred currency without creating a profile.
+    """
+    attached = _attached_currency(user)
+    if attached is not None:
+        return attached
+
+    currency = (
+        Profile.objects.filter(user=user)
+        .values_list("currency", flat=True)
+        .first()
+    )
+    return currency or DEFAULT_CURRENCY
+
+
+def period_label(first, last):
+    """
+    Returns the payload `period` fields for a month or a month range.
+    """
+    if first == last:
+        return {"month": first.strftime("%Y-%m")}
+    return {"from": first.strftime("%Y-%m"), "to": last.strftime("%Y-%m")}
+
+
+def build_dashboard(user, first=None, last=None):
+    """
+    Build the full dashboard payload for the months `first`..`last`
+    (default: the current month).
+    """
+    first = month_start(first or date.today())
+    last = month_start(last or first)
+    overlapping, within, _ = budget_window(first, last)
+
+    with track_degraded() as degraded:
+        summary = run_section("summary", aggregate_period, user, first, last, fallback=None)
+        budgets = run_section(
+            "budgets", list, evaluated_budgets([user.id], overlapping=overlapping, within=within),
+            fallback=[],
+        )
+        goals = run_section("goals", list, Goal.objects.filter(user=user), fallback=[])
+        currency = run_section("currency", get_currency, user, fallback=DEFAULT_CURRENCY)
+
+    payload = {
+        "period": {
+            **period_label(first, last),
+            "currency": currency
+        },
+        "totals": calculate_totals(summary) if summary else empty_totals(),
+        "categories": category_breakdown(summary) if summary else [],
+        "budgets": budget_usage(user, first, last, budgets),
+        "goals": goal_progress(user, goals),
+        "insights": generate_insights(summary) if summary else [],
+    }
+    if degraded:
+        payload["degraded"] = degraded
+    return payload
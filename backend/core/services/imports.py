@@ -0,0 +1,178 @@
+"""
+Bulk transaction import.
+
+Purpose:
+- Stream CSV / JSON-lines uploads row by row (never load the whole file)
+- Validate each row with the same rules as TransactionSerializer
+- Insert valid rows with batched bulk_create, keeping rollups in sync
+- Collect per-row errors without aborting the import
+- Invalidate derived caches for every committed batch, even when the
+  import stops early
+"""
+
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from core.caching import bump_generation
+from core.models import Transaction
+from core.serializers import TransactionSerializer
+from core.services.periods import month_start
+from core.services.rollups import record_transactions
+
+
+BATCH_SIZE = 1000
+
+# Cap on reported errors so a bad file cannot produce a huge response
+MAX_REPORTED_ERRORS = 100
+
+CSV = "csv"
+JSON_LINES = "jsonl"
+
+
+def detect_format(upload):
+    """
+    Guess the upload format from its name or content type.
+    """
+    name = (upload.name or "").lower()
+    content_type = (upload.content_type or "").lower()
+
+    if name.endswith((".jsonl", ".ndjson")) or "json" in content_type:
+        return JSON_LINES
+    return CSV
+
+
+class UnreadableFile(Exception):
+    """
+    The rest of the upload cannot be parsed (bad encoding, broken CSV).
+    """
+
+
+def _text_stream(upload):
+    # utf-8-sig strips the BOM spreadsheet exports like to add
+    upload.seek(0)
+    return io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+
+
+def iter_rows(upload, fmt):
+    """
+    Yield (row_number, data) pairs from an upload.
+
+    `data` is a dict, or an Exception when the line itself is unparseable.
+    CSV row numbers are 1-based and exclude the header; JSON-lines row
+    numbers are file line numbers (blank lines are skipped, not renumbered).
+    Raises UnreadableFile when the rest of a CSV file cannot be read.
+    """
+    if fmt == CSV:
+        number = 0
+        try:
+            for number, row in enumerate(csv.DictReader(_text_stream(upload)), start=1):
+                yield number, row
+        except UnicodeDecodeError as exc:
+            raise UnreadableFile(f"File is not UTF-8 encoded (after row {number}).") from exc
+        except csv.Error as exc:
+            raise UnreadableFile(f"Malformed CSV after row {number}: {exc}") from exc
+        return
+
+    # Lines are decoded one by one so a bad byte only rejects its own line
+    upload.seek(0)
+    for number, raw in enumerate(upload.file, start=1):
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            yield number, ValueError("Line is not UTF-8 encoded.")
+            continue
+
+        if number == 1:
+            line = line.removeprefix("\ufeff")
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("Each line must be a JSON object.")
+            yield number, data
+        except ValueError as exc:
+            yield number, exc
+
+
+def _flush(batch):
+    with transaction.atomic():
+        Transaction.objects.bulk_create(batch)
+        record_transactions(batch)
+
+
+def import_transactions(user, upload, fmt=None):
+    """
+    Import transactions for `user` from an uploaded file.
+
+    Each batch is inserted together with its rollup deltas in one DB
+    transaction, so a failure never leaves rollups out of sync. Caches
+    are invalidated once, for the months of every committed batch,
+    however the import ends.
+
+    Returns a dict:
+    - created: number of rows inserted
+    - failed: number of rejected rows
+    - errors: first MAX_REPORTED_ERRORS {"row", "errors"} entries
+    - file_error: why the file could not be read to the end, or None
+      (rows before that point are still imported)
+    """
+    fmt = fmt or detect_format(upload)
+
+    # One serializer instance: field construction happens once, not per row
+    validator = TransactionSerializer()
+
+    created = 0
+    failed = 0
+    errors = []
+    file_error = None
+    committed_months = set()
+    batch = []
+
+    def flush():
+        nonlocal created, batch
+        _flush(batch)
+        created += len(batch)
+        committed_months.update(month_start(tx.date) for tx in batch)
+        batch = []
+
+    try:
+        try:
+            for number, data in iter_rows(upload, fmt):
+                if isinstance(data, Exception):
+                    detail = {"non_field_errors": [str(data)]}
+                else:
+                    try:
+                        validated = validator.run_validation(data)
+                        detail = None
+                    except ValidationError as exc:
+                        detail = exc.detail
+
+                if detail is not None:
+                    failed += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({"row": number, "errors": detail})
+                    continue
+
+                batch.append(Transaction(user=user, **validated))
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+        except UnreadableFile as exc:
+            file_error = str(exc)
+
+        if batch:
+            flush()
+    finally:
+        if committed_months:
+            bump_generation(user.id, months=committed_months)
+
+    return {
+        "created": created,
+        "failed": failed,
+        "errors": errors,
+        "file_error": file_error,
+    }
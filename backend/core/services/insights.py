@@ -7,35 +7,33 @@ Purpose:
 """
 
 from django.db.models import Sum
-from datetime import date, timedelta
+from datetime import date
 
-from core.models import Transaction
+from core.models import MonthlyCategoryRollup
 
 
 def month_expense(user, year, month):
     """
     Calculate total expenses for a given month.
+    For multi-month series use core.services.timeseries (one query).
     """
     return (
-        Transaction.objects.filter(
+        MonthlyCategoryRollup.objects.filter(
             user=user,
             type="expense",
-            date__year=year,
-            date__month=month
-        ).aggregate(total=Sum("amount"))["total"]
+            month=date(year, month, 1)
+        ).aggregate(total=Sum("total"))["total"]
         or 0
     )
 
 
-def spending_trend_insight(user):
+def spending_trend_insight(summary):
     """
-    Compare current month expenses with previous month.
+    Compare expenses with the previous month (or equally long period).
     """
-    today = date.today()
-    current = month_expense(user, today.year, today.month)
-
-    prev_month = today.replace(day=1) - timedelta(days=1)
-    previous = month_expense(user, prev_month.year, prev_month.month)
+    current = summary["expense"]
+    previous = summary["previous_expense"]
+    label = summary.get("previous_label", "last month")
 
     if previous == 0:
         return None
@@ -43,21 +41,18 @@ def spending_trend_insight(user):
     diff_percent = ((current - previous) / previous) * 100
 
     if diff_percent > 10:
-        return f"Your expenses increased by {round(diff_percent, 1)}% compared to last month"
+        return f"Your expenses increased by {round(diff_percent, 1)}% compared to {label}"
     elif diff_percent < -10:
-        return f"Good job! Your expenses decreased by {abs(round(diff_percent, 1))}% compared to last month"
+        return f"Good job! Your expenses decreased by {abs(round(diff_percent, 1))}% compared to {label}"
 
     return None
 
 
-def top_category_insight(transactions):
+def top_category_insight(summary):
     """
     Identify highest spending category.
     """
-    category_totals = {}
-
-    for tx in transactions.filter(type="expense"):
-        category_totals[tx.category] = category_totals.get(tx.category, 0) + float(tx.amount)
+    category_totals = summary["expense_by_category"]
 
     if not category_totals:
         return None
@@ -66,17 +61,17 @@ def top_category_insight(transactions):
     return f"{top_category} is your highest spending category"
 
 
-def generate_insights(user, transactions):
+def generate_insights(summary):
     """
-    Generate a list of insights.
+    Generate a list of insights from a dashboard month summary.
     """
     insights = []
 
-    trend = spending_trend_insight(user)
+    trend = spending_trend_insight(summary)
     if trend:
         insights.append(trend)
 
-    category = top_category_insight(transactions)
+    category = top_category_insight(summary)
     if category:
         insights.append(category)
 
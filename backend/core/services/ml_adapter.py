@@ -4,13 +4,189 @@ External ML adapter.
 Purpose:
 - Safely consume ML insights
 - Fail silently and return empty insights on error
+
+Performance:
+- Pooled keep-alive HTTP clients (sync + asyncio) instead of a new
+  connection per call
+- Circuit breaker: after FAILURE_THRESHOLD consecutive failures calls are
+  short-circuited (zero latency) until a half-open probe succeeds
+- Per-call latency and outcome metrics (core.metrics), also attributed
+  to the current request's Server-Timing header
 """
 
-import requests
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import httpx
+
+from core import instrumentation, metrics
 
 
-ML_SERVICE_URL = "https://example-ml-service/api/insights"
+ML_SERVICE_URL = os.getenv("ML_SERVICE_URL", "https://example-ml-service/api/insights")
 TIMEOUT_SECONDS = 2
+CONNECT_TIMEOUT_SECONDS = 0.5
+
+# Connection pool sizing (per worker process)
+MAX_CONNECTIONS = 20
+MAX_KEEPALIVE_CONNECTIONS = 10
+
+# Circuit breaker tuning
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT_SECONDS = 30
+
+
+ml_latency = metrics.histogram(
+    "ml_adapter_request_seconds",
+    "Latency of ML insight requests that reached the network."
+)
+ml_calls = metrics.counter(
+    "ml_adapter_calls_total",
+    "ML insight calls by outcome (ok, error, short_circuit)."
+)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> calls flow; FAILURE_THRESHOLD failures in a row open it
+    open      -> calls are rejected until `reset_timeout` elapses
+    half_open -> exactly one probe is let through; success closes the
+                 breaker, failure re-opens it
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            # Half-open: a single probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+breaker = CircuitBreaker()
+
+
+def _timeout():
+    return httpx.Timeout(TIMEOUT_SECONDS, connect=CONNECT_TIMEOUT_SECONDS)
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS
+    )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+# AsyncClient connections are bound to the event loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """
+    Returns the process-wide pooled sync client.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(timeout=_timeout(), limits=_limits())
+    return _client
+
+
+def get_async_client():
+    """
+    Returns the pooled async client for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            timeout=_timeout(), limits=_limits()
+        )
+    return client
+
+
+def _parse_insights(response):
+    """
+    Extract insight messages from a 200 response.
+    """
+    data = response.json()
+    return [
+        item.get("message")
+        for item in data.get("insights", [])
+        if "message" in item
+    ]
+
+
+def _record(started, outcome):
+    elapsed = time.perf_counter() - started
+    ml_latency.observe(elapsed)
+    ml_calls.inc(outcome=outcome)
+    instrumentation.record("ml", elapsed)
+
+
+def _read_response(response):
+    """
+    Returns insights for a response; raises on server-side failures so
+    they count against the breaker.
+    """
+    if response.status_code >= 500:
+        raise httpx.HTTPStatusError(
+            f"ML service returned {response.status_code}",
+            request=response.request,
+            response=response
+        )
+
+    if response.status_code != 200:
+        return []
+    return _parse_insights(response)
 
 
 def fetch_ml_insights(user_id):
@@ -19,25 +195,47 @@ def fetch_ml_insights(user_id):
 
     Returns:
     - List of insight messages
-    - Empty list on failure
+    - Empty list on failure or while the circuit is open
     """
+    if not breaker.allow_request():
+        ml_calls.inc(outcome="short_circuit")
+        return []
+
+    started = time.perf_counter()
     try:
-        response = requests.post(
-            ML_SERVICE_URL,
-            json={"user_id": user_id},
-            timeout=TIMEOUT_SECONDS
-        )
+        response = get_client().post(ML_SERVICE_URL, json={"user_id": user_id})
+        insights = _read_response(response)
+
+    except Exception:
+        # Silent failure: ML must never break the system
+        breaker.record_failure()
+        _record(started, "error")
+        return []
 
-        if response.status_code != 200:
-            return []
+    breaker.record_success()
+    _record(started, "ok")
+    return insights
 
-        data = response.json()
-        return [
-            item.get("message")
-            for item in data.get("insights", [])
-            if "message" in item
-        ]
+
+async def afetch_ml_insights(user_id):
+    """
+    Async variant of fetch_ml_insights for ASGI views.
+    Shares the circuit breaker and metrics with the sync path.
+    """
+    if not breaker.allow_request():
+        ml_calls.inc(outcome="short_circuit")
+        return []
+
+    started = time.perf_counter()
+    try:
+        response = await get_async_client().post(ML_SERVICE_URL, json={"user_id": user_id})
+        insights = _read_response(response)
 
     except Exception:
-        # Silent failure: ML must never break the system
+        breaker.record_failure()
+        _record(started, "error")
         return []
+
+    breaker.record_success()
+    _record(started, "ok")
+    return insights
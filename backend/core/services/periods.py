@@ -0,0 +1,60 @@
+"""
+Calendar period helpers.
+
+Purpose:
+- Month arithmetic shared by services
+- Index-friendly date predicates
+
+Month filters must use half-open `date >= first AND date < next_first`
+ranges (see month_range) rather than `date__year` / `date__month`,
+which compile to EXTRACT/strftime expressions that cannot use the
+(user, ..., date) indexes on Transaction.
+"""
+
+
+def month_start(day):
+    """
+    Returns the first day of the month containing `day`.
+    """
+    return day.replace(day=1)
+
+
+def shift_month(month, delta):
+    """
+    Returns the first day of the month `delta` months away from `month`.
+    Handles year boundaries in both directions.
+    """
+    index = month.year * 12 + (month.month - 1) + delta
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def month_range(day):
+    """
+    Returns (first, next_first) for the month containing `day`.
+    """
+    first = month_start(day)
+    return first, shift_month(first, 1)
+
+
+def month_filter(day, field="date"):
+    """
+    Returns filter kwargs selecting the month containing `day`
+    as a half-open range on `field`.
+    """
+    first, next_first = month_range(day)
+    return {f"{field}__gte": first, f"{field}__lt": next_first}
+
+
+def month_span(first, last):
+    """
+    Returns the number of months from `first` to `last`, inclusive.
+    """
+    return (last.year - first.year) * 12 + (last.month - first.month) + 1
+
+
+def iter_months(first, last):
+    """
+    Yields the first day of every month from `first` to `last`, inclusive.
+    """
+    for delta in range(month_span(first, last)):
+        yield shift_month(first, delta)
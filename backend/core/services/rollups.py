@@ -0,0 +1,182 @@
+"""
+Monthly category rollup maintenance.
+
+Purpose:
+- Keep MonthlyCategoryRollup in sync with Transaction writes
+- Rebuild rollups from raw transactions (backfill / repair)
+- Detect drift between rollups and raw transactions
+
+Reads (dashboard, alerts, insights) should use rollups so their
+cost depends on the number of categories, not on history length.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from core.models import Transaction, MonthlyCategoryRollup
+from core.services.periods import month_filter, month_start
+
+
+def _apply_delta(user_id, month, tx_type, category, amount, count):
+    """
+    Add `amount`/`count` to a single rollup bucket, creating it if needed.
+    Must run inside a DB transaction.
+    """
+    bucket = MonthlyCategoryRollup.objects.filter(
+        user_id=user_id,
+        month=month,
+        type=tx_type,
+        category=category
+    )
+
+    updated = bucket.update(
+        total=F("total") + amount,
+        count=F("count") + count
+    )
+    if updated:
+        return
+
+    try:
+        # Savepoint so a concurrent insert of the same bucket does not
+        # poison the outer transaction
+        with transaction.atomic():
+            MonthlyCategoryRollup.objects.create(
+                user_id=user_id,
+                month=month,
+                type=tx_type,
+                category=category,
+                total=amount,
+                count=count
+            )
+    except IntegrityError:
+        bucket.update(
+            total=F("total") + amount,
+            count=F("count") + count
+        )
+
+
+def record_transactions(transactions):
+    """
+    Fold newly created transactions into their rollup buckets.
+
+    Call inside the same transaction.atomic() block as the insert so
+    rollups never diverge from raw rows.
+    """
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+
+    for tx in transactions:
+        key = (tx.user_id, month_start(tx.date), tx.type, tx.category)
+        deltas[key][0] += Decimal(tx.amount)
+        deltas[key][1] += 1
+
+    # Stable order keeps row locks consistent across concurrent writers
+    for key in sorted(deltas):
+        amount, count = deltas[key]
+        _apply_delta(*key, amount=amount, count=count)
+
+
+def record_transaction(tx):
+    """
+    Fold a single newly created transaction into its rollup bucket.
+    """
+    record_transactions([tx])
+
+
+def _aggregate_transactions(user=None, month=None):
+    """
+    Aggregate raw transactions into rollup-shaped rows.
+    """
+    transactions = Transaction.objects.all()
+    if user is not None:
+        transactions = transactions.filter(user=user)
+    if month is not None:
+        transactions = transactions.filter(**month_filter(month))
+
+    return (
+        transactions
+        .annotate(month=TruncMonth("date"))
+        .values("user_id", "month", "type", "category")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+
+
+def _stored_rollups(user=None, month=None):
+    rollups = MonthlyCategoryRollup.objects.all()
+    if user is not None:
+        rollups = rollups.filter(user=user)
+    if month is not None:
+        rollups = rollups.filter(month=month_start(month))
+    return rollups
+
+
+def rebuild_rollups(user=None, month=None):
+    """
+    Recompute rollups from raw transactions.
+
+    Rebuilds a single user and/or month when given, otherwise everything.
+    Returns the number of rollup rows written.
+    """
+    rollups = _stored_rollups(user, month)
+
+    with transaction.atomic():
+        rollups.delete()
+        created = MonthlyCategoryRollup.objects.bulk_create(
+            [
+                MonthlyCategoryRollup(**row)
+                for row in _aggregate_transactions(user, month).iterator()
+            ],
+            batch_size=1000
+        )
+
+    return len(created)
+
+
+def check_rollups(user=None, month=None):
+    """
+    Compare rollups against raw transactions.
+
+    Returns a list of mismatches; an empty list means consistent.
+    Each mismatch is a dict with the bucket key plus expected and
+    actual (total, count) pairs.
+    """
+    expected = {
+        (row["user_id"], row["month"], row["type"], row["category"]):
+            (row["total"], row["count"])
+        for row in _aggregate_transactions(user, month).iterator()
+    }
+
+    rollups = _stored_rollups(user, month)
+
+    actual = {
+        (row["user_id"], row["month"], row["type"], row["category"]):
+            (row["total"], row["count"])
+        for row in rollups.values(
+            "user_id", "month", "type", "category", "total", "count"
+        ).iterator()
+    }
+
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys()):
+        exp = expected.get(key, (Decimal("0"), 0))
+        act = actual.get(key, (Decimal("0"), 0))
+
+        # Empty buckets left behind are harmless
+        if exp == act or (key not in expected and act[1] == 0):
+            continue
+
+        user_id, month, tx_type, category = key
+        mismatches.append({
+            "user_id": user_id,
+            "month": month,
+            "type": tx_type,
+            "category": category,
+            "expected": exp,
+            "actual": act,
+        })
+
+    return mismatches
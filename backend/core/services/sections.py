@@ -0,0 +1,104 @@
+"""
+Payload sections with failure isolation.
+
+Purpose:
+- Build the independent parts of a payload (dashboard totals, budgets,
+  goals, ML insights...) so that a part that raises or overruns its
+  timeout is replaced by its fallback instead of failing the response
+- Report which sections degraded so callers can cache them briefly
+
+Database sections run on the caller's thread (Django connections are
+per thread) one after another: a query that has started cannot be
+interrupted, so they take no timeout. Blocking network calls (the ML
+service) are started first in `io_executor` and overlap those queries;
+their timeout bounds how long the caller waits for them.
+"""
+
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+
+from core import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Threads for blocking network calls made by sections. A timed-out call
+# is abandoned: the caller stops waiting, the thread finishes on its own.
+IO_WORKERS = 10
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="sections-io")
+
+section_failures = metrics.counter(
+    "payload_section_failures_total",
+    "Sections replaced by their fallback, by section and reason (timeout, error)."
+)
+
+_degraded = contextvars.ContextVar("degraded_sections", default=None)
+
+
+@contextmanager
+def track_degraded():
+    """
+    Collect the names of sections that fell back within the block.
+    Yields a list that is filled in place; names are also passed on to
+    an enclosing tracker.
+    """
+    parent = _degraded.get()
+    degraded = []
+    token = _degraded.set(degraded)
+    try:
+        yield degraded
+    finally:
+        _degraded.reset(token)
+        if parent is not None:
+            parent.extend(degraded)
+
+
+def _fall_back(name, reason, fallback):
+    section_failures.inc(section=name, reason=reason)
+    degraded = _degraded.get()
+    if degraded is not None:
+        degraded.append(name)
+    return fallback
+
+
+def run_section(name, func, *args, fallback):
+    """
+    Call `func(*args)` on this thread, returning `fallback` if it raises.
+    """
+    try:
+        return func(*args)
+    except Exception:
+        logger.exception("Section %s failed.", name)
+        return _fall_back(name, "error", fallback)
+
+
+def start_section(func, *args):
+    """
+    Start blocking `func(*args)` in `io_executor`, keeping the caller's
+    context (e.g. request instrumentation). Returns a Future for
+    finish_section.
+    """
+    context = contextvars.copy_context()
+    future = io_executor.submit(context.run, func, *args)
+    future.started = time.monotonic()
+    return future
+
+
+def finish_section(name, future, fallback, timeout=None):
+    """
+    Wait for a started section until `timeout` seconds after it was
+    started, returning `fallback` on timeout or error.
+    """
+    if timeout is not None:
+        timeout = max(timeout - (time.monotonic() - future.started), 0)
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        logger.warning("Section %s timed out.", name)
+        return _fall_back(name, "timeout", fallback)
+    except Exception:
+        logger.exception("Section %s failed.", name)
+        return _fall_back(name, "error", fallback)
@@ -0,0 +1,140 @@
+"""
+Time-series aggregation for trend charts.
+
+Purpose:
+- Income / expense / savings per month, week or day over a window
+- Optional per-category expense split
+- One grouped query per series, whatever the number of buckets
+
+Monthly series read MonthlyCategoryRollup directly; weekly and daily
+series group raw transactions with TruncWeek / TruncDay over the
+(user, date) index. Buckets without data are zero-filled in Python.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDay, TruncWeek
+
+from core.models import MonthlyCategoryRollup, Transaction
+from core.services.periods import iter_months, month_start, shift_month
+
+
+MONTH = "month"
+WEEK = "week"
+DAY = "day"
+
+# Upper bound on `months` per granularity, keeping responses small
+MAX_MONTHS = {
+    MONTH: 36,
+    WEEK: 12,
+    DAY: 3,
+}
+
+TRUNCATE = {
+    WEEK: TruncWeek,
+    DAY: TruncDay,
+}
+
+
+def window_start(months, today=None):
+    """
+    Returns the first day of a window covering the current month and
+    the `months - 1` months before it.
+    """
+    today = today or date.today()
+    return shift_month(month_start(today), -(months - 1))
+
+
+def bucket_starts(granularity, start, today):
+    """
+    Returns every bucket start from `start` up to `today`, in order.
+    Weekly buckets start on Mondays, like TruncWeek.
+    """
+    if granularity == MONTH:
+        return list(iter_months(start, month_start(today)))
+
+    step = timedelta(days=7 if granularity == WEEK else 1)
+    current = start - timedelta(days=start.weekday()) if granularity == WEEK else start
+
+    buckets = []
+    while current <= today:
+        buckets.append(current)
+        current += step
+    return buckets
+
+
+def _grouped_rows(user, granularity, start, by_category):
+    """
+    Single GROUP BY bucket, type[, category] query.
+    Returns rows of {"bucket", "type"(, "category"), "sum"}.
+    """
+    fields = ["bucket", "type"] + (["category"] if by_category else [])
+
+    if granularity == MONTH:
+        queryset = (
+            MonthlyCategoryRollup.objects
+            .filter(user=user, month__gte=start)
+            .values(*fields[1:], bucket=F("month"))
+            .annotate(sum=Sum("total"))
+        )
+    else:
+        queryset = (
+            Transaction.objects
+            .filter(user=user, date__gte=start)
+            .annotate(bucket=TRUNCATE[granularity]("date"))
+            .values(*fields)
+            .annotate(sum=Sum("amount"))
+        )
+
+    return queryset.order_by()
+
+
+def build_timeseries(user, months=12, granularity=MONTH, by_category=False, today=None):
+    """
+    Build a zero-filled time series for the last `months` months.
+
+    Returns a dict:
+    - granularity, months
+    - buckets: [{"start", "income", "expense", "savings"(, "categories")}]
+    """
+    today = today or date.today()
+    start = window_start(months, today)
+    starts = bucket_starts(granularity, start, today)
+
+    income = defaultdict(Decimal)
+    expense = defaultdict(Decimal)
+    categories = defaultdict(lambda: defaultdict(Decimal))
+
+    for row in _grouped_rows(user, granularity, starts[0], by_category):
+        bucket = row["bucket"]
+        if row["type"] == "income":
+            income[bucket] += row["sum"]
+            continue
+
+        expense[bucket] += row["sum"]
+        if by_category:
+            categories[bucket][row["category"]] += row["sum"]
+
+    buckets = []
+    for bucket in starts:
+        entry = {
+            "start": bucket.isoformat(),
+            "income": float(income[bucket]),
+            "expense": float(expense[bucket]),
+            "savings": float(income[bucket] - expense[bucket]),
+        }
+        if by_category:
+            entry["categories"] = {
+                category: float(total)
+                for category, total in categories[bucket].items()
+            }
+        buckets.append(entry)
+
+    return {
+        "granularity": granularity,
+        "months": months,
+        "buckets": buckets,
+    }
@@ -2,11 +2,51 @@
 Celery tasks for alerts and ML insights.
 """
 
+import logging
+import time
+import uuid
+from concurrent.futures import wait
+
 from celery import shared_task
 from django.contrib.auth.models import User
+from django.core.cache import cache
 
+from core.caching import (
+    ALERTS_HARD_TTL,
+    ALERTS_SOFT_TTL,
+    DEGRADED_SOFT_TTL,
+    alerts_key,
+    get_generation,
+    get_generations,
+    refresh_for_user_id,
+    store,
+    store_many,
+)
 from core.services.ml_adapter import fetch_ml_insights
-from core.services.alerts import generate_rule_based_alerts
+from core.services.alerts import (
+    build_alerts,
+    generate_rule_based_alerts_for_users,
+)
+from core.services.sections import io_executor, track_degraded
+
+
+logger = logging.getLogger(__name__)
+
+# Fleet job tuning
+FLEET_CHUNK_SIZE = 500
+
+# Checkpoint older than this belongs to an abandoned run and is discarded;
+# must stay above the beat interval (CELERY_BEAT_SCHEDULE["fleet-alerts"])
+FLEET_CHECKPOINT_MAX_AGE = 60 * 60
+
+FLEET_LOCK_KEY = "alerts:fleet:lock"
+# Lock is refreshed after every chunk, so a crashed run frees it quickly
+FLEET_LOCK_TTL = 5 * 60
+# Seconds a chunk waits for ML insights (fetched IO_WORKERS at a time);
+# well under FLEET_LOCK_TTL so a slow ML service cannot outlive the lock
+FLEET_ML_TIMEOUT = 60
+FLEET_CHECKPOINT_KEY = "alerts:fleet:checkpoint"
+FLEET_STATS_KEY = "alerts:fleet:stats"
 
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=5, retry_kwargs={"max_retries": 3})
@@ -14,13 +54,174 @@ def run_alerts_for_user(self, user_id):
     """
     Background task to compute alerts for a user.
     Safe to retry and fail silently.
+    Result is written to the same cache key AlertsView reads.
     """
     try:
         user = User.objects.get(id=user_id)
     except User.DoesNotExist:
         return []
 
-    rule_alerts = generate_rule_based_alerts(user)
-    ml_alerts = fetch_ml_insights(user.id)
+    key = alerts_key(user.id, get_generation(user.id))
+    with track_degraded() as degraded:
+        alerts = build_alerts(user)
+    store(key, alerts, DEGRADED_SOFT_TTL if degraded else ALERTS_SOFT_TTL, ALERTS_HARD_TTL)
+
+    return alerts
+
+
+@shared_task(ignore_result=True)
+def refresh_cached_section(section_name, user_id, token=None):
+    """
+    Recompute a stale dashboard/alerts cache entry (stale-while-revalidate).
+    The enqueuing request already holds the section's refresh lock under
+    `token`; it is released only if still held under that token.
+    """
+    refresh_for_user_id(section_name, user_id, token)
+
+
+def _load_checkpoint():
+    """
+    Returns the last processed user id of an interrupted run, or 0.
+    """
+    checkpoint = cache.get(FLEET_CHECKPOINT_KEY)
+    if not checkpoint:
+        return 0
+
+    if time.time() - checkpoint["updated_at"] > FLEET_CHECKPOINT_MAX_AGE:
+        return 0
+
+    return checkpoint["last_user_id"]
+
+
+def fetch_ml_insights_for_users(user_ids, timeout=FLEET_ML_TIMEOUT):
+    """
+    Fetch ML insights for many users concurrently in `io_executor`.
+
+    Returns {user_id: insights} for the calls that finished within
+    `timeout` seconds; calls not started by then are cancelled.
+    """
+    futures = {io_executor.submit(fetch_ml_insights, user_id): user_id for user_id in user_ids}
+    done, pending = wait(futures, timeout=timeout)
+    for future in pending:
+        future.cancel()
+
+    if pending:
+        logger.warning("ML insights timed out for %s of %s users.", len(pending), len(user_ids))
+    return {futures[future]: future.result() for future in done}
+
+
+def _owns_fleet_lock(token):
+    return cache.get(FLEET_LOCK_KEY) == token
+
+
+def _release_fleet_lock(token):
+    """
+    Delete the fleet lock only while it still holds `token`: once it has
+    expired, another run may own it. get + delete is not atomic, but
+    that only leaves the gap between the two calls.
+    """
+    if _owns_fleet_lock(token):
+        cache.delete(FLEET_LOCK_KEY)
+
+
+@shared_task(bind=True)
+def run_alerts_for_all_users(self, chunk_size=FLEET_CHUNK_SIZE):
+    """
+    Compute rule-based (+ ML) alerts for every active user.
+
+    - Walks active users in id order, `chunk_size` ids at a time
+    - Each chunk costs a constant number of queries (see
+      generate_rule_based_alerts_for_users) and at most two cache writes
+    - ML insights are fetched concurrently and bounded by
+      FLEET_ML_TIMEOUT per chunk; users whose call did not finish get
+      rule alerts only, cached for DEGRADED_SOFT_TTL
+    - A checkpoint is written after every chunk. A crashed run is not
+      redelivered (a redelivery would find the dead run's lock and skip):
+      its lock expires within FLEET_LOCK_TTL and the next scheduled run
+      resumes from the checkpoint instead of starting over
+    - Progress and timing are published under FLEET_STATS_KEY
+    - The lock holds a per-run token; a run that finds it lost (expired
+      and taken by another run) stops after its current chunk
+    """
+    token = uuid.uuid4().hex
+    if not cache.add(FLEET_LOCK_KEY, token, timeout=FLEET_LOCK_TTL):
+        logger.info("Fleet alerts run already in progress; skipping.")
+        return None
+
+    started = time.monotonic()
+    resumed_from = last_user_id = _load_checkpoint()
+    users = chunks = 0
+
+    try:
+        while True:
+            chunk_started = time.monotonic()
+
+            user_ids = list(
+                User.objects
+                .filter(is_active=True, id__gt=last_user_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not user_ids:
+                break
+
+            # Generations are read before computing so a concurrent write
+            # orphans this result instead of being overwritten by it
+            generations = get_generations(user_ids)
+            rule_alerts = generate_rule_based_alerts_for_users(user_ids)
+            ml_insights = fetch_ml_insights_for_users(user_ids, FLEET_ML_TIMEOUT)
+
+            complete, degraded = {}, {}
+            for user_id, alerts in rule_alerts.items():
+                key = alerts_key(user_id, generations[user_id])
+                if user_id in ml_insights:
+                    complete[key] = alerts + ml_insights[user_id]
+                else:
+                    degraded[key] = alerts
+            if complete:
+                store_many(complete, ALERTS_SOFT_TTL, ALERTS_HARD_TTL)
+            if degraded:
+                store_many(degraded, DEGRADED_SOFT_TTL, ALERTS_HARD_TTL)
+
+            last_user_id = user_ids[-1]
+            users += len(user_ids)
+            chunks += 1
+
+            if not _owns_fleet_lock(token):
+                logger.warning("Fleet alerts lock lost after user %s; stopping.", last_user_id)
+                return None
+            cache.touch(FLEET_LOCK_KEY, FLEET_LOCK_TTL)
+            cache.set(
+                FLEET_CHECKPOINT_KEY,
+                {"last_user_id": last_user_id, "updated_at": time.time()},
+                timeout=FLEET_CHECKPOINT_MAX_AGE
+            )
+            cache.set(FLEET_STATS_KEY, {
+                "state": "running",
+                "resumed_from": resumed_from,
+                "last_user_id": last_user_id,
+                "users": users,
+                "chunks": chunks,
+                "last_chunk_seconds": round(time.monotonic() - chunk_started, 3),
+                "elapsed_seconds": round(time.monotonic() - started, 3),
+            }, timeout=None)
+
+        stats = {
+            "state": "finished",
+            "resumed_from": resumed_from,
+            "last_user_id": last_user_id,
+            "users": users,
+            "chunks": chunks,
+            "elapsed_seconds": round(time.monotonic() - started, 3),
+        }
+        cache.set(FLEET_STATS_KEY, stats, timeout=None)
+        cache.delete(FLEET_CHECKPOINT_KEY)
+
+        logger.info(
+            "Fleet alerts computed for %s users in %s chunks (%.2fs, resumed from %s).",
+            users, chunks, stats["elapsed_seconds"], resumed_from
+        )
+        return stats
 
-    return rule_alerts + ml_alerts
+    finally:
+        _release_fleet_lock(token)
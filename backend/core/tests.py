@@ -1,3 +1,1502 @@
-from django.test import TestCase
+import asyncio
+import fnmatch
+import gzip
+import json
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest import mock, skipUnless
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import cache_backends, caching, instrumentation, metrics, throttles
+from benchmarks import suite
+from testing.query_budget import QueryBudgetExceeded, QueryBudgetMixin
+from core.renderers import ORJSONRenderer
+from core.models import Budget, Goal, Transaction, MonthlyCategoryRollup
+from core.services.alerts import (
+    build_alerts,
+    budget_overuse_alerts,
+    generate_rule_based_alerts,
+    load_alert_windows,
+    low_savings_alert,
+    unusual_spending_alert,
+    window_months,
+)
+from core.services import imports, ml_adapter, sections
+from core.services.budgets import evaluate_budget, evaluated_budgets
+from core.services.ml_adapter import CircuitBreaker
+from core.serializers import TransactionRows, TransactionSerializer
+from core.services.dashboard import aggregate_month, budget_usage, calculate_totals
+from core.services.periods import month_filter, month_range, month_start, shift_month
+from core.services.rollups import (
+    check_rollups,
+    rebuild_rollups,
+    record_transaction,
+)
+from core.tasks import FLEET_CHECKPOINT_KEY, FLEET_LOCK_KEY, FLEET_STATS_KEY, run_alerts_for_all_users
+from users.models import Profile
+
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+FAILOVER_CACHES = {
+    "default": {
+        "BACKEND": "core.cache_backends.FailoverCache",
+        "OPTIONS": {"PRIMARY": "redis-stand-in", "RETRY_AFTER": 30},
+    },
+    "redis-stand-in": {
+        "BACKEND": "core.tests.RedisStandIn",
+        "LOCATION": "redis-stand-in",
+    },
+}
+
+
+class RedisStandIn(LocMemCache):
+    """
+    Local stand-in for Redis that raises connection errors while `down`.
+    """
+    down = False
+
+    def _check(self):
+        if RedisStandIn.down:
+            raise ConnectionError("Redis is down")
+
+    def add(self, *args, **kwargs):
+        self._check()
+        return super().add(*args, **kwargs)
+
+    def get(self, *args, **kwargs):
+        self._check()
+        return super().get(*args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        self._check()
+        return super().set(*args, **kwargs)
+
+    def touch(self, *args, **kwargs):
+        self._check()
+        return super().touch(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        self._check()
+        return super().delete(*args, **kwargs)
+
+    def incr(self, *args, **kwargs):
+        self._check()
+        return super().incr(*args, **kwargs)
+
+    def has_key(self, *args, **kwargs):
+        self._check()
+        return super().has_key(*args, **kwargs)
+
+    def delete_pattern(self, pattern):
+        self._check()
+        made = self.make_key(pattern)
+        for key in [key for key in self._cache if fnmatch.fnmatchcase(key, made)]:
+            self._delete(key)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MonthlyRollupTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post_transaction(self, **data):
+        payload = {
+            "type": "expense",
+            "category": "Food",
+            "amount": "10.00",
+            "date": date.today().isoformat(),
+        }
+        payload.update(data)
+        response = self.client.post("/api/transactions/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_post_updates_rollup(self):
+        self.post_transaction(amount="10.00")
+        self.post_transaction(amount="5.50")
+        self.post_transaction(type="income", category="Salary", amount="100.00")
+
+        food = MonthlyCategoryRollup.objects.get(
+            user=self.user, type="expense", category="Food"
+        )
+        self.assertEqual(food.month, date.today().replace(day=1))
+        self.assertEqual(food.total, Decimal("15.50"))
+        self.assertEqual(food.count, 2)
+        self.assertEqual(check_rollups(self.user), [])
+
+    def test_dashboard_reads_rollups(self):
+        self.post_transaction(amount="40.00")
+        self.post_transaction(type="income", category="Salary", amount="100.00")
+
+        data = self.client.get("/api/dashboard/summary/").json()
+        self.assertEqual(data["totals"]["income"], 100.0)
+        self.assertEqual(data["totals"]["expense"], 40.0)
+        self.assertEqual(data["categories"], [{"category": "Food", "expense": 40.0}])
+
+    def test_check_detects_drift_and_rebuild_repairs(self):
+        self.post_transaction(amount="10.00")
+        # Raw insert that bypasses the rollup write path
+        Transaction.objects.create(
+            user=self.user, type="expense", category="Travel",
+            amount=Decimal("7.00"), date=date(2024, 1, 15),
+        )
+
+        mismatches = check_rollups(self.user)
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual(mismatches[0]["category"], "Travel")
+
+        self.assertEqual(rebuild_rollups(self.user), 2)
+        self.assertEqual(check_rollups(self.user), [])
+
+    def test_check_rollups_command_repairs(self):
+        Transaction.objects.create(
+            user=self.user, type="income", category="Salary",
+            amount=Decimal("50.00"), date=date(2024, 2, 1),
+        )
+        call_command("check_rollups", "--repair", stdout=StringIO())
+        self.assertEqual(check_rollups(), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DashboardAggregationTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("bob", password="pw")
+        Profile.objects.create(user=self.user, currency="USD")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        today = date.today()
+        last_month = month_start(today) - timedelta(days=1)
+        rows = [
+            ("income", "Salary", "1000.00", today),
+            ("expense", "Food", "120.10", today),
+            ("expense", "Food", "30.20", today),
+            ("expense", "Rent", "500.00", today),
+            ("expense", "Food", "100.00", last_month),
+        ]
+        for tx_type, category, amount, day in rows:
+            self.client.post("/api/transactions/", {
+                "type": tx_type, "category": category,
+                "amount": amount, "date": day.isoformat(),
+            }, format="json")
+
+        for category in ("Food", "Rent", "Travel"):
+            Budget.objects.create(
+                user=self.user, category=category, limit_amount=Decimal("200.00"),
+                start_date=month_start(today), end_date=today,
+            )
+        Goal.objects.create(
+            user=self.user, name="Car", target_amount=Decimal("1000.00"),
+            deadline=today,
+        )
+
+    def test_summary_uses_constant_queries(self):
+        cache.clear()
+        # month aggregate, budgets, goals (the profile is already attached to the user)
+        with self.assertNumQueries(3):
+            response = self.client.get("/api/dashboard/summary/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_summary_sections_share_aggregate(self):
+        cache.clear()
+        data = self.client.get("/api/dashboard/summary/").json()
+
+        self.assertEqual(data["period"]["currency"], "USD")
+        self.assertEqual(data["totals"], {
+            "income": 1000.0, "expense": 650.3, "savings": 349.7,
+        })
+        self.assertCountEqual(data["categories"], [
+            {"category": "Food", "expense": 150.3},
+            {"category": "Rent", "expense": 500.0},
+        ])
+        statuses = {b["category"]: b["status"] for b in data["budgets"]}
+        self.assertEqual(statuses, {"Food": "ok", "Rent": "exceeded", "Travel": "ok"})
+        self.assertIn("Rent is your highest spending category", data["insights"])
+        self.assertTrue(any("increased" in i for i in data["insights"]))
+
+    def test_totals_stay_decimal(self):
+        totals = calculate_totals(aggregate_month(self.user))
+        self.assertEqual(totals["expense"], Decimal("650.30"))
+        self.assertIsInstance(totals["savings"], Decimal)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AlertRuleEngineTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("carol", password="pw")
+
+    def add(self, tx_type, category, amount, day):
+        record_transaction(Transaction.objects.create(
+            user=self.user, type=tx_type, category=category,
+            amount=Decimal(amount), date=day,
+        ))
+
+    def test_window_crosses_year_boundary(self):
+        self.assertEqual(
+            window_months(date(2025, 2, 10)),
+            [date(2025, 2, 1), date(2025, 1, 1), date(2024, 12, 1), date(2024, 11, 1)],
+        )
+
+    def test_query_count_independent_of_budgets(self):
+        today = date.today()
+        for i in range(30):
+            Budget.objects.create(
+                user=self.user, category=f"Cat{i}", limit_amount=Decimal("10.00"),
+                start_date=month_start(today), end_date=today,
+            )
+            self.add("expense", f"Cat{i}", "20.00", today)
+
+        # alert window + budgets
+        with self.assertNumQueries(2):
+            alerts = generate_rule_based_alerts(self.user)
+        self.assertEqual(len([a for a in alerts if "budget" in a]), 30)
+
+    def test_rules_evaluated_from_window(self):
+        today = date(2025, 1, 15)
+        self.add("income", "Salary", "1000.00", today)
+        self.add("expense", "Food", "950.00", today)
+        self.add("expense", "Food", "100.00", date(2024, 12, 3))
+        self.add("expense", "Food", "200.00", date(2024, 11, 3))
+
+        window = load_alert_windows([self.user.id], today)[self.user.id]
+        self.assertEqual(window["expense"], [
+            Decimal("950.00"), Decimal("100.00"), Decimal("200.00"), Decimal("0"),
+        ])
+        self.assertIsNotNone(low_savings_alert(window))
+        self.assertIsNotNone(unusual_spending_alert(window))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BudgetEngineTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("bea", password="pw")
+        self.other = User.objects.create_user("ben", password="pw")
+
+        for user, tx_type, category, amount, day in [
+            (self.user, "expense", "Food", "100.00", date(2024, 12, 31)),
+            (self.user, "expense", "Food", "40.00", date(2025, 1, 5)),
+            (self.user, "expense", "Food", "60.00", date(2025, 2, 10)),
+            (self.user, "expense", "Food", "25.00", date(2025, 3, 31)),
+            (self.user, "expense", "Rent", "500.00", date(2025, 2, 1)),
+            (self.user, "income", "Food", "999.00", date(2025, 2, 2)),
+            (self.other, "expense", "Food", "70.00", date(2025, 2, 3)),
+        ]:
+            Transaction.objects.create(
+                user=user, type=tx_type, category=category, amount=Decimal(amount), date=day,
+            )
+
+        self.quarter = self.budget(self.user, "100.00", date(2025, 1, 1), date(2025, 3, 31))
+        self.february = self.budget(self.user, "80.00", date(2025, 2, 1), date(2025, 2, 28))
+        self.others = self.budget(self.other, "50.00", date(2025, 2, 1), date(2025, 2, 28))
+
+    def budget(self, user, limit, start, end):
+        return Budget.objects.create(
+            user=user, category="Food", limit_amount=Decimal(limit), start_date=start, end_date=end,
+        )
+
+    def test_overlapping_and_multi_month_ranges_in_one_query(self):
+        with self.assertNumQueries(1):
+            spent = {
+                budget.id: budget.spent
+                for budget in evaluated_budgets([self.user.id, self.other.id])
+            }
+
+        self.assertEqual(spent, {
+            self.quarter.id: Decimal("125.00"),
+            self.february.id: Decimal("60.00"),
+            self.others.id: Decimal("70.00"),
+        })
+
+    def test_utilization_and_pace(self):
+        budget = evaluated_budgets([self.user.id], active_on=date(2025, 2, 14)).get(id=self.february.id)
+        self.assertEqual(evaluate_budget(budget, date(2025, 2, 14)), {
+            "category": "Food",
+            "start_date": "2025-02-01",
+            "end_date": "2025-02-28",
+            "limit": 80.0,
+            "spent": 60.0,
+            "utilization_percent": 75.0,
+            "projected": 120.0,
+            "days_elapsed": 14,
+            "days_total": 28,
+            "status": "at_risk",
+        })
+        self.assertEqual(evaluate_budget(budget, date(2025, 3, 5))["status"], "ok")
+
+        budgets = evaluated_budgets([self.user.id], active_on=date(2025, 2, 14))
+        self.assertEqual(budget_overuse_alerts(budgets, date(2025, 2, 14)), [
+            "You have exceeded your Food budget for Jan 01 to Mar 31.",
+            "At your current pace you will exceed your Food budget before Feb 28.",
+        ])
+
+    def test_zero_limit_and_early_pace(self):
+        budget = evaluated_budgets([self.user.id]).get(id=self.february.id)
+        self.assertEqual(evaluate_budget(budget, date(2025, 2, 1))["status"], "ok")
+        self.assertEqual(evaluate_budget(budget, date(2025, 2, 3))["status"], "at_risk")
+
+        budget.limit_amount = Decimal("0")
+        usage = evaluate_budget(budget, date(2025, 2, 14))
+        self.assertEqual((usage["utilization_percent"], usage["status"]), (None, "exceeded"))
+
+    def test_closed_period_is_evaluated_as_of_its_last_day(self):
+        usage = budget_usage(self.user, date(2025, 1, 1))
+
+        self.assertEqual([(b["end_date"], b["spent"], b["status"]) for b in usage], [
+            ("2025-03-31", 40.0, "at_risk"),
+        ])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TransactionListingTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("dave", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                type="expense" if i % 2 else "income",
+                category="Food" if i % 3 else "Rent",
+                amount=Decimal(i + 1),
+                # Several rows share a date to exercise the id tie-breaker
+                date=date(2025, 1, 1) + timedelta(days=i // 3),
+            )
+            for i in range(25)
+        ])
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        seen = []
+        url = "/api/transactions/?page_size=7"
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(data["results"])
+            url = data["next"]
+
+        self.assertEqual(len(seen), 25)
+        dates = [row["date"] for row in seen]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(
+            sorted(Decimal(row["amount"]) for row in seen),
+            [Decimal(i + 1) for i in range(25)],
+        )
+
+    def test_page_query_count_is_constant(self):
+        first = self.client.get("/api/transactions/?page_size=5").json()
+        with self.assertNumQueries(1):
+            self.client.get(first["next"])
+
+    def test_filters(self):
+        data = self.client.get(
+            "/api/transactions/",
+            {"type": "expense", "category": "Food", "min_amount": "5", "date_to": "2025-01-06"},
+        ).json()
+        for row in data["results"]:
+            self.assertEqual((row["type"], row["category"]), ("expense", "Food"))
+            self.assertGreaterEqual(Decimal(row["amount"]), 5)
+            self.assertLessEqual(row["date"], "2025-01-06")
+        self.assertTrue(data["results"])
+
+    def test_invalid_params(self):
+        self.assertEqual(
+            self.client.get("/api/transactions/", {"cursor": "garbage"}).status_code, 404
+        )
+        self.assertEqual(
+            self.client.get("/api/transactions/", {"min_amount": "9", "max_amount": "1"}).status_code, 400
+        )
+
+
+    def test_fast_path_matches_serializer_byte_for_byte(self):
+        Transaction.objects.bulk_create([
+            Transaction(user=self.user, type="expense", category="Café ☕", amount=Decimal("0.10"),
+                        date=date(2024, 2, 29), note="Line\nbreak \"quoted\""),
+            Transaction(user=self.user, type="income", category="Salary", amount=Decimal("99999999.99"),
+                        date=date(2024, 3, 1), note=""),
+        ])
+        transactions = Transaction.objects.filter(user=self.user).order_by("-date", "-id")
+
+        rows = TransactionRows()
+        expected = JSONRenderer().render(TransactionSerializer(transactions, many=True).data)
+        self.assertEqual(ORJSONRenderer().render(rows.to_rows(rows.queryset(transactions))), expected)
+
+    def test_sparse_fieldsets_and_columnar_layout(self):
+        data = self.client.get("/api/transactions/", {"fields": "amount,date", "page_size": 3}).json()
+        self.assertEqual(list(data["results"][0]), ["amount", "date"])
+        self.assertIsNotNone(data["next"])
+
+        rows = self.client.get("/api/transactions/", {"page_size": 3}).json()["results"]
+        columnar = self.client.get(
+            "/api/transactions/", {"fields": "type, amount", "layout": "columnar", "page_size": 3}
+        ).json()["results"]
+        self.assertEqual(columnar, {
+            "type": [row["type"] for row in rows],
+            "amount": [row["amount"] for row in rows],
+        })
+
+        self.assertEqual(self.client.get("/api/transactions/", {"fields": "user"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/transactions/", {"layout": "xml"}).status_code, 400)
+
+
+class TransactionIndexTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("erin", password="pw")
+
+    def explain(self, **filters):
+        return Transaction.objects.filter(user=self.user, **filters).explain()
+
+    def test_month_range_helper(self):
+        self.assertEqual(month_range(date(2024, 12, 31)), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(
+            month_filter(date(2025, 3, 9)),
+            {"date__gte": date(2025, 3, 1), "date__lt": date(2025, 4, 1)},
+        )
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN output is SQLite specific")
+    def test_month_range_uses_composite_indexes(self):
+        month = month_filter(date(2025, 3, 9))
+
+        self.assertIn("tx_user_date_idx", self.explain(**month))
+        self.assertIn("tx_user_type_date_idx", self.explain(type="expense", **month))
+        self.assertIn("tx_user_category_date_idx", self.explain(category="Food", **month))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TransactionImportTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user("frank", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name, content):
+        return self.client.post(
+            "/api/transactions/import/",
+            {"file": SimpleUploadedFile(name, content if isinstance(content, bytes) else content.encode())},
+            format="multipart",
+        )
+
+    def test_csv_import_batches_and_reports_errors(self):
+        lines = ["type,category,amount,date,note"]
+        lines += [f"expense,Food,{i + 1}.00,2025-01-{i % 28 + 1:02d}," for i in range(2500)]
+        lines += ["expense,Food,-3,2025-01-01,negative", "bogus,Food,3,2025-01-01,"]
+
+        generation = caching.get_generation(self.user.id)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.upload("bank.csv", "\n".join(lines))
+
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual((data["created"], data["failed"]), (2500, 2))
+        self.assertEqual([e["row"] for e in data["errors"]], [2501, 2502])
+        self.assertIn("amount", data["errors"][0]["errors"])
+
+        # A few statements per batch, not one round trip per row
+        self.assertLess(len(ctx.captured_queries), 50)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2500)
+        self.assertEqual(check_rollups(self.user), [])
+        # Invalidated once for the whole import
+        self.assertEqual(caching.get_generation(self.user.id), generation + 1)
+
+    def test_json_lines_import(self):
+        content = "\n".join([
+            json.dumps({"type": "income", "category": "Salary", "amount": "900.00", "date": "2025-02-01"}),
+            "",
+            "{not json",
+            "",
+            '{"category": "Caf\xe9"}',
+        ]).encode("latin-1")
+        data = self.upload("bank.jsonl", content).json()
+
+        self.assertEqual((data["created"], data["failed"]), (1, 2))
+        # File line numbers, blank lines included
+        self.assertEqual([e["row"] for e in data["errors"]], [3, 5])
+        self.assertIn("UTF-8", data["errors"][1]["errors"]["non_field_errors"][0])
+        self.assertEqual(
+            MonthlyCategoryRollup.objects.get(user=self.user).total, Decimal("900.00")
+        )
+
+    def test_latin1_csv_keeps_rows_read_before_the_bad_byte(self):
+        lines = ["type,category,amount,date,note"]
+        lines += ["expense,Food,1.00,2025-01-01,"] * 1200
+        lines += ["expense,Caf\xe9,2.00,2025-01-02,"]
+        generation = caching.get_generation(self.user.id)
+
+        response = self.upload("bank.csv", "\n".join(lines).encode("latin-1"))
+
+        self.assertEqual(response.status_code, 400)
+        data = response.json()
+        self.assertIn("not UTF-8", data["detail"])
+        self.assertGreater(data["created"], 0)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), data["created"])
+        self.assertEqual(caching.get_generation(self.user.id), generation + 1)
+
+    def test_committed_batches_invalidate_caches_when_the_import_fails(self):
+        lines = ["type,category,amount,date,note"]
+        lines += ["expense,Food,1.00,2025-01-01,"] * (imports.BATCH_SIZE + 1)
+        generation = caching.get_generation(self.user.id)
+        flush = imports._flush
+        calls = []
+
+        def flush_once(batch):
+            calls.append(len(batch))
+            if len(calls) > 1:
+                raise DatabaseError("connection lost")
+            flush(batch)
+
+        upload = SimpleUploadedFile("bank.csv", "\n".join(lines).encode())
+        with mock.patch("core.services.imports._flush", side_effect=flush_once):
+            with self.assertRaises(DatabaseError):
+                imports.import_transactions(self.user, upload)
+
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), imports.BATCH_SIZE)
+        self.assertEqual(caching.get_generation(self.user.id), generation + 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("core.tasks.fetch_ml_insights", return_value=[])
+class FleetAlertsTaskTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        today = date.today()
+        self.users = []
+        for i in range(5):
+            user = User.objects.create_user(f"fleet{i}", password="pw")
+            Budget.objects.create(
+                user=user, category="Food", limit_amount=Decimal("10.00"),
+                start_date=month_start(today), end_date=today,
+            )
+            record_transaction(Transaction.objects.create(
+                user=user, type="expense", category="Food",
+                amount=Decimal("20.00"), date=today,
+            ))
+            self.users.append(user)
+        User.objects.create_user("inactive", password="pw", is_active=False)
+
+    def test_chunks_use_constant_queries_and_fill_alerts_cache(self, _ml):
+        # per chunk: user ids, alert windows, budgets; plus the final empty id page
+        with self.assertNumQueries(3 * 3 + 1):
+            stats = run_alerts_for_all_users(chunk_size=2)
+
+        self.assertEqual((stats["users"], stats["chunks"]), (5, 3))
+        for user in self.users:
+            self.assertEqual(
+                cache.get(caching.SECTIONS["alerts"].key(user.id))["value"],
+                ["You have exceeded your Food budget for this month."],
+            )
+        self.assertEqual(cache.get(FLEET_STATS_KEY)["state"], "finished")
+        self.assertIsNone(cache.get(FLEET_CHECKPOINT_KEY))
+
+    def test_slow_ml_calls_are_bounded_per_chunk(self, _ml):
+        slow = self.users[1].id
+        _ml.side_effect = lambda user_id: time.sleep(1) or [] if user_id == slow else ["ML insight"]
+
+        with mock.patch("core.tasks.FLEET_ML_TIMEOUT", 0.3), self.assertLogs("core.tasks", "WARNING"):
+            run_alerts_for_all_users(chunk_size=5)
+
+        fast = cache.get(caching.SECTIONS["alerts"].key(self.users[0].id))
+        self.assertEqual(fast["value"][-1], "ML insight")
+        degraded = cache.get(caching.SECTIONS["alerts"].key(slow))
+        self.assertEqual(degraded["value"], ["You have exceeded your Food budget for this month."])
+        self.assertLess(degraded["fresh_until"], time.time() + caching.DEGRADED_SOFT_TTL + 1)
+
+    def test_run_that_lost_the_lock_stops_and_leaves_it(self, _ml):
+        def take_over(user_ids, timeout):
+            # The lock expired mid-chunk and another run acquired it
+            cache.set(FLEET_LOCK_KEY, "other-run")
+            return {}
+
+        with mock.patch("core.tasks.fetch_ml_insights_for_users", side_effect=take_over), \
+                self.assertLogs("core.tasks", "WARNING"):
+            self.assertIsNone(run_alerts_for_all_users(chunk_size=2))
+
+        self.assertEqual(cache.get(FLEET_LOCK_KEY), "other-run")
+        self.assertIsNone(cache.get(FLEET_CHECKPOINT_KEY))
+
+    def test_resumes_from_checkpoint(self, _ml):
+        cache.set(FLEET_CHECKPOINT_KEY, {
+            "last_user_id": self.users[2].id, "updated_at": time.time(),
+        })
+
+        stats = run_alerts_for_all_users(chunk_size=2)
+
+        self.assertEqual(stats["resumed_from"], self.users[2].id)
+        self.assertEqual(stats["users"], 2)
+        self.assertIsNone(cache.get(caching.SECTIONS["alerts"].key(self.users[0].id)))
+        self.assertIsNotNone(cache.get(caching.SECTIONS["alerts"].key(self.users[4].id)))
+
+
+class StubMLServer:
+    """
+    Local stand-in for the ML service.
+
+    `status`, `payload` and `delay` can be changed between requests;
+    `hits` counts requests received.
+    """
+
+    def __init__(self):
+        self.status = 200
+        self.payload = {"insights": [{"message": "Stub insight"}]}
+        self.delay = 0
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.hits += 1
+                time.sleep(stub.delay)
+                body = json.dumps(stub.payload).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/insights"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class MLAdapterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.stub = StubMLServer()
+        self.addCleanup(self.stub.close)
+        patcher = mock.patch.object(ml_adapter, "ML_SERVICE_URL", self.stub.url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        ml_adapter.breaker.reset()
+        self.addCleanup(ml_adapter.breaker.reset)
+
+    def test_fetch_parses_insights_and_records_latency(self):
+        before = ml_adapter.ml_latency.count()
+        self.assertEqual(ml_adapter.fetch_ml_insights(1), ["Stub insight"])
+        self.assertEqual(ml_adapter.ml_latency.count(), before + 1)
+
+    def test_latency_is_attributed_to_the_current_request(self):
+        with instrumentation.request_scope() as timings:
+            ml_adapter.fetch_ml_insights(1)
+        self.assertEqual(timings.counts["ml"], 1)
+        self.assertGreater(timings.durations["ml"], 0)
+
+    def test_async_fetch(self):
+        self.assertEqual(asyncio.run(ml_adapter.afetch_ml_insights(1)), ["Stub insight"])
+
+    def test_breaker_opens_then_half_open_probe_closes_it(self):
+        self.stub.status = 503
+        for _ in range(ml_adapter.FAILURE_THRESHOLD):
+            self.assertEqual(ml_adapter.fetch_ml_insights(1), [])
+        self.assertEqual(ml_adapter.breaker.state, CircuitBreaker.OPEN)
+
+        # Open circuit: no network call at all
+        hits = self.stub.hits
+        self.assertEqual(ml_adapter.fetch_ml_insights(1), [])
+        self.assertEqual(self.stub.hits, hits)
+
+        self.stub.status = 200
+        ml_adapter.breaker.opened_at -= ml_adapter.breaker.reset_timeout
+        self.assertEqual(ml_adapter.fetch_ml_insights(1), ["Stub insight"])
+        self.assertEqual(ml_adapter.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConcurrentSectionsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.user = User.objects.create_user("nora", password="pw")
+
+    def test_ml_call_overlaps_rule_queries(self):
+        rules_running = threading.Event()
+        ml_running = threading.Event()
+
+        def rules(user):
+            rules_running.set()
+            return ["Rule alert"] if ml_running.wait(5) else ["ML never ran alongside"]
+
+        def ml(user_id):
+            ml_running.set()
+            return ["Stub insight"] if rules_running.wait(5) else []
+
+        # In series, whichever side runs first would wait for the other in vain
+        with mock.patch("core.services.alerts.generate_rule_based_alerts", side_effect=rules), \
+                mock.patch("core.services.alerts.fetch_ml_insights", side_effect=ml):
+            self.assertEqual(build_alerts(self.user), ["Rule alert", "Stub insight"])
+
+    def test_slow_ml_degrades_without_failing(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def stuck_ml(user_id):
+            release.wait(5)
+            return ["Too late"]
+
+        with mock.patch("core.services.alerts.fetch_ml_insights", side_effect=stuck_ml), \
+                mock.patch("core.services.alerts.ML_SECTION_TIMEOUT", 0.1), \
+                self.assertLogs("core.services.sections", "WARNING"), \
+                sections.track_degraded() as degraded:
+            alerts = build_alerts(self.user)
+
+        # Returned while the ML call was still blocked
+        self.assertFalse(release.is_set())
+        self.assertEqual(alerts, [])
+        self.assertEqual(degraded, ["ml"])
+
+    def test_failed_section_is_degraded_and_cached_briefly(self):
+        Goal.objects.create(
+            user=self.user, name="Bike", target_amount=Decimal("500.00"), deadline=date.today(),
+        )
+        failing = mock.Mock(side_effect=RuntimeError("database unavailable"))
+        with mock.patch("core.services.dashboard.aggregate_period", failing), \
+                self.assertLogs("core.services.sections", "ERROR"):
+            data = caching.refresh("dashboard", self.user)
+
+        # Same shape as a healthy payload
+        self.assertEqual(data["totals"], {"income": 0, "expense": 0, "savings": 0})
+        self.assertEqual(data["budgets"], [])
+        self.assertEqual([goal["name"] for goal in data["goals"]], ["Bike"])
+        self.assertEqual(data["degraded"], ["summary"])
+
+        entry = cache.get(caching.SECTIONS["dashboard"].key(self.user.id))
+        self.assertLessEqual(entry["fresh_until"], time.time() + caching.DEGRADED_SOFT_TTL)
+
+        self.assertNotIn("degraded", caching.refresh("dashboard", self.user))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StaleWhileRevalidateTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.user = User.objects.create_user("gina", password="pw")
+        self.key = caching.SECTIONS["alerts"].key(self.user.id)
+        self.build = mock.Mock(return_value=["fresh alert"])
+        patcher = mock.patch.object(caching.SECTIONS["alerts"], "build", self.build)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_miss_computes_and_caches_empty_results(self):
+        self.build.return_value = []
+        self.assertEqual(caching.get_section("alerts", self.user), [])
+        self.assertEqual(caching.get_section("alerts", self.user), [])
+        self.assertEqual(self.build.call_count, 1)
+
+    @mock.patch("core.tasks.refresh_cached_section.apply_async")
+    def test_stale_entry_served_while_single_refresh_is_enqueued(self, enqueue):
+        cache.set(self.key, {"value": ["old alert"], "fresh_until": time.time() - 1})
+
+        for _ in range(3):
+            self.assertEqual(caching.get_section("alerts", self.user), ["old alert"])
+
+        enqueue.assert_called_once_with(("alerts", self.user.id, mock.ANY), retry=False)
+        self.build.assert_not_called()
+
+        token = enqueue.call_args.args[0][2]
+        self.assertEqual(cache.get(f"{self.key}:lock"), token)
+        caching.refresh_for_user_id("alerts", self.user.id, token)
+        self.assertIsNone(cache.get(f"{self.key}:lock"))
+        self.assertEqual(caching.get_section("alerts", self.user), ["fresh alert"])
+
+    def test_refresh_leaves_a_lock_it_no_longer_owns(self):
+        def slow_build(user):
+            # Our lock expired mid-build and another request took it
+            cache.set(f"{self.key}:lock", "other-holder")
+            return ["fresh alert"]
+
+        self.build.side_effect = slow_build
+        self.assertEqual(caching.get_section("alerts", self.user), ["fresh alert"])
+        self.assertEqual(cache.get(f"{self.key}:lock"), "other-holder")
+
+    @mock.patch("core.tasks.refresh_cached_section.apply_async", side_effect=OSError)
+    def test_stale_refresh_runs_inline_without_broker(self, _enqueue):
+        cache.set(self.key, {"value": ["old alert"], "fresh_until": time.time() - 1})
+
+        self.assertEqual(caching.get_section("alerts", self.user), ["old alert"])
+        self.assertEqual(cache.get(self.key)["value"], ["fresh alert"])
+        self.assertFalse(cache.get(f"{self.key}:lock"))
+
+    def test_concurrent_miss_waits_for_lock_holder(self):
+        cache.add(f"{self.key}:lock", 1)
+        threading.Timer(
+            0.1, caching.store, (self.key, ["from holder"], 30, 60)
+        ).start()
+
+        self.assertEqual(caching.get_section("alerts", self.user), ["from holder"])
+        self.build.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GenerationInvalidationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("hank", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = date.today()
+
+    def dashboard(self):
+        return self.client.get("/api/dashboard/summary/").json()
+
+    def test_backdated_transaction_invalidates_every_month(self):
+        keys_before = caching.SECTIONS["dashboard"].key(self.user.id)
+        self.dashboard()
+
+        self.client.post("/api/transactions/", {
+            "type": "expense", "category": "Food", "amount": "12.00",
+            "date": date(2020, 1, 5).isoformat(),
+        }, format="json")
+
+        self.assertNotEqual(caching.SECTIONS["dashboard"].key(self.user.id), keys_before)
+
+    def test_budget_goal_and_profile_writes_refresh_dashboard(self):
+        self.assertEqual(self.dashboard()["budgets"], [])
+
+        self.client.post("/api/budgets/", {
+            "category": "Food", "limit_amount": "100.00",
+            "start_date": month_start(self.today).isoformat(),
+            "end_date": self.today.isoformat(),
+        }, format="json")
+        self.assertEqual(len(self.dashboard()["budgets"]), 1)
+
+        self.client.post("/api/goals/", {
+            "name": "Trip", "target_amount": "500.00", "deadline": self.today.isoformat(),
+        }, format="json")
+        self.assertEqual(len(self.dashboard()["goals"]), 1)
+
+        self.client.put("/api/profile/", {"monthly_income": "10.00", "currency": "EUR"}, format="json")
+        self.assertEqual(self.dashboard()["period"]["currency"], "EUR")
+
+    def test_generation_survives_eviction_without_reviving_old_keys(self):
+        first = caching.get_generation(self.user.id)
+        cache.delete(caching.generation_key(self.user.id))
+        self.assertGreater(caching.bump_generation(self.user.id), first)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TwoTierCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.user = User.objects.create_user("ivy", password="pw")
+
+    def tier(self, tier, result):
+        return caching.tier_reads.value(tier=tier, result=result)
+
+    def test_repeat_reads_are_served_locally(self):
+        caching.get_section("dashboard", self.user)
+        local_hits, shared_hits = self.tier("local", "hit"), self.tier("shared", "hit")
+
+        with self.assertNumQueries(0):
+            caching.get_section("dashboard", self.user)
+
+        self.assertEqual(self.tier("local", "hit"), local_hits + 1)
+        self.assertEqual(self.tier("shared", "hit"), shared_hits)
+
+    def test_other_workers_invalidation_is_respected(self):
+        first = caching.get_section("dashboard", self.user)
+        self.assertEqual(first["goals"], [])
+
+        # Simulate another worker: write + bump straight in the shared tier
+        Goal.objects.create(
+            user=self.user, name="Bike", target_amount=Decimal("300.00"),
+            deadline=date.today(),
+        )
+        cache.incr(caching.generation_key(self.user.id))
+
+        self.assertEqual(len(caching.get_section("dashboard", self.user)["goals"]), 1)
+
+    def test_lru_is_bounded_and_ttl_aware(self):
+        lru = caching.LocalLRU(max_entries=2, ttl=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+
+        lru.set("d", 4, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(lru.get("d"))
+
+
+@override_settings(CACHES=FAILOVER_CACHES)
+@mock.patch("core.services.alerts.fetch_ml_insights", return_value=[])
+class CacheFailoverTests(TestCase):
+
+    def setUp(self):
+        RedisStandIn.down = False
+        self.addCleanup(setattr, RedisStandIn, "down", False)
+        self.health = cache_backends.get_health("redis-stand-in")
+        self.health.mark_up()
+        cache.clear()
+        caching.local_cache.clear()
+
+        self.redis = caches["redis-stand-in"]
+        self.user = User.objects.create_user("jack", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_views_and_throttles_work_while_redis_is_down(self, _ml):
+        RedisStandIn.down = True
+        errors = cache_backends.backend_errors.value(operation="get")
+
+        self.assertEqual(self.client.get("/api/dashboard/summary/").status_code, 200)
+        self.assertEqual(self.client.get("/api/alerts/").status_code, 200)
+
+        self.assertFalse(self.health.healthy)
+        # Only the first call pays for the error; the rest go straight to the fallback
+        self.assertEqual(cache_backends.backend_errors.value(operation="get"), errors + 1)
+
+    def test_writes_during_outage_expire_within_the_fallback_cap(self, _ml):
+        RedisStandIn.down = True
+        generation = caching.bump_generation(self.user.id)
+        self.client.get("/api/dashboard/summary/")
+        key = caching.SECTIONS["dashboard"].key(self.user.id)
+        self.assertIsNotNone(cache.get(key))
+
+        later = time.time() + cache_backends.FALLBACK_MAX_TIMEOUT + 1
+        with mock.patch("django.core.cache.backends.locmem.time.time", return_value=later):
+            self.assertIsNone(cache.get(key))
+            # The counter expired too and is reseeded past the old value
+            self.assertGreater(caching.get_generation(self.user.id), generation)
+
+    def test_non_connection_errors_still_reach_the_caller(self, _ml):
+        with self.assertRaises(ValueError):
+            cache.incr("missing-key")
+        self.assertTrue(self.health.healthy)
+
+    def test_keys_written_during_outage_are_dropped_on_recovery(self, _ml):
+        before = caching.get_generation(self.user.id)
+
+        RedisStandIn.down = True
+        during = caching.bump_generation(self.user.id)
+        self.assertGreater(during, before)
+        self.assertEqual(cache.get(caching.generation_key(self.user.id)), during)
+
+        RedisStandIn.down = False
+        with mock.patch("core.cache_backends.time.monotonic", return_value=time.monotonic() + 31):
+            after = caching.get_generation(self.user.id)
+
+        self.assertTrue(self.health.healthy)
+        # The stale pre-outage counter was dropped and reseeded past every old value
+        self.assertGreater(after, during)
+        self.assertEqual(self.redis.get(caching.generation_key(self.user.id)), after)
+
+    def test_untracked_outage_writes_purge_every_generation_on_recovery(self, _ml):
+        other = User.objects.create_user("kate", password="pw")
+        stale = caching.get_generation(other.id)
+
+        RedisStandIn.down = True
+        with mock.patch("core.cache_backends.MAX_TRACKED_KEYS", 1), \
+                self.assertLogs("core.cache_backends", "WARNING"):
+            caching.bump_generation(self.user.id)
+            # Not tracked: recovery cannot delete this key by name
+            caching.bump_generation(other.id)
+        self.assertTrue(self.health.overflowed)
+
+        RedisStandIn.down = False
+        with mock.patch("core.cache_backends.time.monotonic", return_value=time.monotonic() + 31), \
+                self.assertLogs("core.cache_backends", "WARNING"):
+            self.assertGreater(caching.get_generation(other.id), stale)
+
+        self.assertTrue(self.health.healthy)
+        self.assertFalse(self.health.overflowed)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class HistoricalDashboardTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.user = User.objects.create_user("kate", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        current = month_start(date.today())
+        self.past = shift_month(current, -3)
+        for month, amount in [(shift_month(current, -4), "50.00"), (self.past, "80.00"),
+                              (shift_month(current, -2), "20.00")]:
+            self.post_expense(amount, month)
+
+    def post_expense(self, amount, day):
+        response = self.client.post("/api/transactions/", {
+            "type": "expense", "category": "Food", "amount": amount, "date": day.isoformat(),
+        }, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def dashboard(self, **params):
+        response = self.client.get("/api/dashboard/summary/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_month_and_range(self):
+        month = self.dashboard(month=f"{self.past:%Y-%m}")
+        self.assertEqual(month["period"]["month"], f"{self.past:%Y-%m}")
+        self.assertEqual(Decimal(str(month["totals"]["expense"])), Decimal("80.00"))
+        self.assertIn("increased by 60.0% compared to last month", month["insights"][0])
+
+        last = shift_month(self.past, 1)
+        span = self.dashboard(**{"from": f"{self.past:%Y-%m}", "to": f"{last:%Y-%m}"})
+        self.assertEqual(span["period"]["to"], f"{last:%Y-%m}")
+        self.assertEqual(Decimal(str(span["totals"]["expense"])), Decimal("100.00"))
+
+    def test_closed_month_snapshot_survives_unrelated_writes(self):
+        params = {"month": f"{self.past:%Y-%m}"}
+        self.dashboard(**params)
+
+        self.post_expense("5.00", date.today())
+        with self.assertNumQueries(0):
+            self.dashboard(**params)
+
+        self.post_expense("10.00", self.past)
+        self.assertEqual(Decimal(str(self.dashboard(**params)["totals"]["expense"])), Decimal("90.00"))
+
+    def test_closed_month_budgets_only_count_spend_inside_the_month(self):
+        current = month_start(date.today())
+        Budget.objects.create(
+            user=self.user, category="Food", limit_amount=Decimal("100.00"),
+            start_date=shift_month(current, -5), end_date=shift_month(self.past, 1) - timedelta(days=1),
+        )
+        params = {"month": f"{self.past:%Y-%m}"}
+        self.assertEqual(self.dashboard(**params)["budgets"][0]["spent"], 80.0)
+
+        # Inside the budget but outside the months the snapshot key covers
+        self.post_expense("500.00", shift_month(current, -5))
+        budgets = self.dashboard(**params)["budgets"]
+        self.assertEqual(budgets, budget_usage(self.user, self.past))
+        self.assertEqual((budgets[0]["spent"], budgets[0]["status"]), (80.0, "ok"))
+
+        self.post_expense("30.00", self.past)
+        self.assertEqual(self.dashboard(**params)["budgets"][0]["status"], "exceeded")
+
+    def test_invalid_periods_are_rejected(self):
+        for params in ({"month": "2024-13"}, {"from": "2024-05"},
+                       {"from": "2024-05", "to": "2024-01"},
+                       {"from": "2020-01", "to": "2024-01"},
+                       {"month": "2024-01", "from": "2024-01", "to": "2024-02"}):
+            self.assertEqual(self.client.get("/api/dashboard/summary/", params).status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TimeseriesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.user = User.objects.create_user("liam", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.today = date.today()
+
+        current = month_start(self.today)
+        for day, tx_type, category, amount in [
+            (current, "income", "Salary", "1000.00"),
+            (current, "expense", "Food", "40.00"),
+            (self.today, "expense", "Rent", "300.00"),
+            (shift_month(current, -5), "expense", "Food", "25.00"),
+        ]:
+            tx = Transaction.objects.create(
+                user=self.user, type=tx_type, category=category,
+                amount=Decimal(amount), date=day,
+            )
+            record_transaction(tx)
+
+    def series(self, **params):
+        response = self.client.get("/api/dashboard/timeseries/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_monthly_series_is_one_query_and_zero_filled(self):
+        with self.assertNumQueries(1):
+            data = self.series(months=24, by_category="true")
+
+        buckets = data["buckets"]
+        self.assertEqual(len(buckets), 24)
+        self.assertEqual(buckets[-1]["start"], month_start(self.today).isoformat())
+        self.assertEqual(buckets[-1]["income"], 1000.0)
+        self.assertEqual(buckets[-1]["savings"], 660.0)
+        self.assertEqual(buckets[-1]["categories"], {"Food": 40.0, "Rent": 300.0})
+        self.assertEqual(buckets[-6]["expense"], 25.0)
+        self.assertEqual(buckets[-2], {"start": buckets[-2]["start"], "income": 0.0,
+                                       "expense": 0.0, "savings": 0.0, "categories": {}})
+
+    def test_daily_and_weekly_series_match_monthly_totals(self):
+        daily = self.series(months=1, granularity="day")["buckets"]
+        self.assertEqual(len(daily), self.today.day)
+        self.assertEqual(sum(b["expense"] for b in daily), 340.0)
+
+        weekly = self.series(months=1, granularity="week")["buckets"]
+        self.assertEqual(date.fromisoformat(weekly[0]["start"]).weekday(), 0)
+        self.assertEqual(sum(b["expense"] for b in weekly), 340.0)
+
+    def test_cached_until_next_write(self):
+        self.series(months=3)
+        with self.assertNumQueries(0):
+            self.series(months=3)
+
+        caching.bump_generation(self.user.id, months=[self.today])
+        with self.assertNumQueries(1):
+            self.series(months=3)
+
+    def test_window_is_bounded_per_granularity(self):
+        for params in ({"months": 0}, {"months": 37}, {"months": 4, "granularity": "day"},
+                       {"granularity": "year"}):
+            self.assertEqual(self.client.get("/api/dashboard/timeseries/", params).status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.user = User.objects.create_user("mia", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_data_is_answered_with_304_without_queries(self):
+        for url in ("/api/transactions/", "/api/budgets/", "/api/goals/",
+                    "/api/dashboard/summary/", "/api/dashboard/timeseries/", "/api/alerts/"):
+            with self.subTest(url=url), mock.patch("core.services.alerts.fetch_ml_insights", return_value=[]):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertEqual(first["Cache-Control"], "private, no-cache")
+
+                with self.assertNumQueries(0):
+                    second = self.client.get(url, HTTP_IF_NONE_MATCH=f'W/{first["ETag"]}')
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second.content, b"")
+
+    def test_writes_and_query_strings_change_the_etag(self):
+        etag = self.client.get("/api/transactions/")["ETag"]
+        self.assertNotEqual(self.client.get("/api/transactions/?type=income")["ETag"], etag)
+
+        self.client.post("/api/goals/", {
+            "name": "Car", "target_amount": "900.00", "deadline": date.today().isoformat(),
+        }, format="json")
+        response = self.client.get("/api/transactions/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class RenderingAndCompressionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("noah", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_orjson_output_matches_drf_renderer(self):
+        data = {
+            "amount": Decimal("12.50"), "day": date(2024, 2, 29),
+            "at": datetime(2024, 2, 29, 10, 30, 15, 123456, tzinfo=dt_timezone.utc),
+            "nested": [{"name": "Café"}, None, True, 1.5],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_malformed_json_body_is_a_400(self):
+        response = self.client.post(
+            "/api/transactions/", data="{not json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.json()["detail"])
+
+    def test_large_responses_are_gzipped(self):
+        Transaction.objects.bulk_create(
+            Transaction(user=self.user, type="expense", category="Food",
+                        amount=Decimal("9.99"), date=date.today(), note=f"Lunch {i}")
+            for i in range(100)
+        )
+
+        plain = self.client.get("/api/transactions/")
+        compressed = self.client.get("/api/transactions/", HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertLess(len(compressed.content), len(plain.content))
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get("/api/goals/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class BenchmarkSuiteTests(TestCase):
+
+    def test_report_covers_every_scenario_cold_and_warm(self):
+        report = suite.run_benchmarks(users=2, transactions=30, budgets=2, goals=1, iterations=2)
+
+        self.assertEqual(report["meta"]["dataset"]["transactions_per_user"], 30)
+        results = {(r["scenario"], r["cache"]): r for r in report["results"]}
+        for name in ("dashboard", "alerts", "transactions_list", "transactions_create", "login", "refresh"):
+            for mode in (suite.COLD, suite.WARM):
+                self.assertEqual(results[name, mode]["iterations"], 2)
+
+        self.assertLess(
+            results["dashboard", suite.WARM]["queries"]["mean"],
+            results["dashboard", suite.COLD]["queries"]["mean"],
+        )
+        json.dumps(report)
+
+        self.assertEqual(suite.compare(report, report)[0][2:], (1.0, 1.0, 0))
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(suite.percentile(values, 50), 50)
+        self.assertEqual(suite.percentile(values, 99), 99)
+        self.assertEqual(suite.percentile([7], 95), 7)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GCRAThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        throttles.local_store.clear()
+        self.addCleanup(throttles.redis_health.mark_up)
+        self.user = User.objects.create_user("pia", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_allows_a_burst_then_one_request_per_interval(self):
+        now = 1000.0
+        results = [throttles.gcra_local("k", 1.0, 3, now) for _ in range(4)]
+
+        self.assertEqual([r[0] for r in results], [True, True, True, False])
+        self.assertEqual([r[1] for r in results[:3]], [2, 1, 0])
+        self.assertAlmostEqual(results[3][2], 1.0)
+
+        allowed, remaining, _, _ = throttles.gcra_local("k", 1.0, 3, now + 1.0)
+        self.assertTrue(allowed)
+        self.assertEqual(remaining, 0)
+
+    def test_ratelimit_headers_and_retry_after(self):
+        with mock.patch.object(throttles.DashboardThrottle, "rate", "2/min"):
+            first = self.client.get("/api/dashboard/summary/")
+            self.client.get("/api/dashboard/summary/")
+            limited = self.client.get("/api/dashboard/summary/")
+
+        self.assertEqual(first["RateLimit-Limit"], "2")
+        self.assertEqual(first["RateLimit-Remaining"], "1")
+        self.assertEqual(first["RateLimit-Policy"], "2;w=60")
+
+        self.assertEqual(limited.status_code, 429)
+        self.assertEqual(limited["RateLimit-Remaining"], "0")
+        self.assertEqual(limited["Retry-After"], "30")
+
+    def test_falls_back_in_process_while_redis_is_down(self):
+        redis_call = mock.Mock(side_effect=ConnectionError("Redis is down"))
+        with mock.patch.object(throttles, "_redis_client", return_value=object()), \
+                mock.patch.object(throttles, "gcra_redis", redis_call), \
+                self.assertLogs("core.throttles", "WARNING"):
+            results = [throttles.gcra("k", 1.0, 2, time.time())[0] for _ in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        # Only the first call tried Redis; the rest went straight to the local store
+        self.assertEqual(redis_call.call_count, 1)
+        self.assertFalse(throttles.redis_health.healthy)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class InstrumentationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        caching.local_cache.clear()
+        self.user = User.objects.create_user("olga", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def timing(self, response):
+        entries = {}
+        for entry in response["Server-Timing"].split(", "):
+            name, *params = entry.split(";")
+            entries[name] = dict(param.split("=", 1) for param in params)
+        return entries
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_breaks_down_the_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/dashboard/summary/")
+
+        timing = self.timing(response)
+        self.assertEqual(timing["db"]["desc"], f'"{len(queries)} queries"')
+        self.assertEqual(timing["cache"]["desc"], '"0 hits 1 misses"')
+        self.assertEqual(set(timing), {"db", "cache", "ml", "view", "total"})
+        self.assertLessEqual(float(timing["view"]["dur"]), float(timing["total"]["dur"]))
+
+        cached = self.timing(self.client.get("/api/dashboard/summary/"))
+        self.assertEqual(cached["db"]["desc"], '"0 queries"')
+        self.assertEqual(cached["cache"]["desc"], '"1 hits 0 misses"')
+
+    def test_server_timing_is_off_by_default(self):
+        response = self.client.get("/api/dashboard/summary/")
+        self.assertNotIn("Server-Timing", response)
+
+        with override_settings(DEBUG=True):
+            self.assertIn("Server-Timing", self.client.get("/api/dashboard/summary/"))
+
+    @override_settings(DEBUG=True)
+    def test_metrics_endpoint_exposes_route_histograms(self):
+        self.client.get("/api/dashboard/summary/")
+
+        body = self.client.get("/api/metrics/").content.decode()
+        self.assertIn("# TYPE http_request_seconds histogram", body)
+        self.assertIn(
+            'http_request_db_queries_count{route="api/dashboard/summary/"}', body
+        )
+        self.assertIn('http_request_seconds_bucket{method="GET",route="api/dashboard/summary/",le="+Inf"}', body)
+        self.assertIn("# TYPE derived_cache_reads_total counter", body)
+
+    def test_metrics_endpoint_is_closed_without_a_token(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_metrics_endpoint_can_require_a_token(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        self.assertEqual(
+            self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200
+        )
+
+    def test_prometheus_label_values_are_escaped(self):
+        counter = metrics.counter("test_escaping_total", "Escaping test.")
+        counter.inc(path='a"b\\c')
+        self.assertIn('test_escaping_total{path="a\\"b\\\\c"} 1', metrics.render_prometheus())
+
+
+# Declared per-endpoint budgets: (max queries, max rows fetched) for a
+# cold cache. Rows scale with budgets/goals, which are capped at 50 here.
+ENDPOINT_QUERY_BUDGETS = {
+    "/api/dashboard/summary/": (4, 120),
+    "/api/dashboard/timeseries/?months=12&by_category=true": (1, 120),
+    "/api/alerts/": (2, 80),
+    "/api/transactions/": (1, 51),
+    "/api/budgets/": (1, 51),
+    "/api/goals/": (1, 51),
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@mock.patch("core.services.alerts.fetch_ml_insights", return_value=[])
+class EndpointQueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    CATEGORIES = ["Food", "Rent", "Travel", "Health", "Fun"]
+
+    def setUp(self):
+        self.user = User.objects.create_user("pete", password="pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def seed(self, size):
+        """
+        size * 10 transactions over the last year, size budgets and goals.
+        """
+        Transaction.objects.filter(user=self.user).delete()
+        Budget.objects.filter(user=self.user).delete()
+        Goal.objects.filter(user=self.user).delete()
+
+        today = date.today()
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=self.user, type="income" if i % 7 == 0 else "expense",
+                category=self.CATEGORIES[i % len(self.CATEGORIES)],
+                amount=Decimal(i + 1), date=today - timedelta(days=(i * 11) % 365),
+            )
+            for i in range(size * 10)
+        )
+        rebuild_rollups(self.user)
+        Budget.objects.bulk_create(
+            Budget(user=self.user, category=self.CATEGORIES[i % len(self.CATEGORIES)],
+                   limit_amount=Decimal("100.00"), start_date=month_start(today), end_date=today)
+            for i in range(size)
+        )
+        Goal.objects.bulk_create(
+            Goal(user=self.user, name=f"Goal {i}", target_amount=Decimal("500.00"), deadline=today)
+            for i in range(size)
+        )
+
+    def test_endpoints_stay_within_budget_at_every_dataset_size(self, _ml):
+        for url, (queries, rows) in ENDPOINT_QUERY_BUDGETS.items():
+            def request():
+                cache.clear()
+                caching.local_cache.clear()
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+            with self.subTest(url=url):
+                self.assertFlatQueryCount(self.seed, request, sizes=(1, 10, 50),
+                                          queries=queries, rows=rows, label=url)
+
+    def test_budget_failure_lists_the_offending_sql(self, _ml):
+        self.seed(3)
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with self.assertQueryBudget(queries=0, label="goals"):
+                list(Goal.objects.filter(user=self.user))
+
+        message = str(raised.exception)
+        self.assertIn("goals: 1 queries (budget 0)", message)
+        self.assertIn('[3 rows] SELECT "core_goal"', message)
+
+    def test_growing_query_count_is_flagged(self, _ml):
+        def per_goal_queries():
+            for goal in Goal.objects.filter(user=self.user):
+                Goal.objects.get(id=goal.id)
+
+        with self.assertRaisesRegex(QueryBudgetExceeded, "grows with data"):
+            self.assertFlatQueryCount(self.seed, per_goal_queries, sizes=(1, 3))
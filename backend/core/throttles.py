@@ -1,8 +1,248 @@
-from rest_framework.throttling import UserRateThrottle
+"""
+Rate limiting with GCRA (generic cell rate algorithm).
+
+Purpose:
+- O(1) throttle state: one timestamp per key (the "theoretical arrival
+  time") instead of DRF's list of every request in the window
+- Atomic decisions: on Redis the read-check-write is a single Lua
+  script, so concurrent requests cannot race past the limit
+- Keep throttling when Redis is down by falling back to an in-process
+  store (limits are then per worker process) for RETRY_AFTER seconds
+- Without a Redis cache configured (local development, tests) state is
+  kept in the default cache, like DRF's throttles
+- Expose the decision as RateLimit-* headers (RateLimitHeadersMiddleware)
+
+A rate of N requests per period allows bursts of up to N and then one
+request every period / N seconds, which matches what DRF's sliding
+window allows without storing the window.
+
+The Redis script reads the clock with TIME so all workers share one
+clock (requires Redis >= 5, which replicates script effects).
+"""
+
+import hashlib
+import logging
+import math
+import threading
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from redis.exceptions import NoScriptError
+from rest_framework.throttling import (
+    AnonRateThrottle as DRFAnonRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle as DRFUserRateThrottle,
+)
+
+from core import metrics
+from core.cache_backends import FAILOVER_ERRORS, BackendHealth, RETRY_AFTER_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+# CACHES alias of the django-redis cache holding throttle state
+DEFAULT_THROTTLE_CACHE = "redis"
+LOCAL_MAX_ENTRIES = 10000
+
+# KEYS[1]: throttle key; ARGV[1]: emission interval (us); ARGV[2]: burst.
+# Returns {allowed, remaining, retry_after (us), reset (us)}.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000000 + tonumber(clock[2])
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+local new_tat = tat + interval
+local allow_at = new_tat - burst * interval
+if now < allow_at then
+    return {0, 0, allow_at - now, tat - now}
+end
+
+redis.call('SET', KEYS[1], string.format('%d', new_tat), 'PX', math.max(1, math.ceil((new_tat - now) / 1000)))
+return {1, math.floor((now - allow_at) / interval), 0, new_tat - now}
+"""
+GCRA_SCRIPT_SHA = hashlib.sha1(GCRA_SCRIPT.encode()).hexdigest()
+
+MICROSECONDS = 1000000
+
+
+throttle_decisions = metrics.counter(
+    "throttle_decisions_total",
+    "Throttle decisions by scope and result (allowed, limited)."
+)
+throttle_store_errors = metrics.counter(
+    "throttle_store_errors_total",
+    "Redis errors that moved throttling to the in-process store."
+)
+
+
+class RateLimit:
+    """
+    Outcome of one throttle check. Durations are in seconds.
+    """
+    __slots__ = ("allowed", "limit", "remaining", "retry_after", "reset", "window")
+
+    def __init__(self, allowed, limit, remaining, retry_after, reset, window):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.retry_after = retry_after
+        self.reset = reset
+        self.window = window
+
+    def headers(self):
+        """
+        RateLimit-* response headers (IETF draft "RateLimit header fields").
+        """
+        return {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(math.ceil(self.reset)),
+            "RateLimit-Policy": f"{self.limit};w={self.window}",
+        }
+
+
+# In-process store: LocMemCache gives bounded size and expiry; the lock
+# makes read-check-write atomic within the process
+local_store = LocMemCache("throttle-gcra", {"OPTIONS": {"MAX_ENTRIES": LOCAL_MAX_ENTRIES}})
+_local_lock = threading.Lock()
+
+redis_health = BackendHealth(RETRY_AFTER_SECONDS)
+
+
+def gcra_local(key, interval, burst, now, store=local_store):
+    """
+    GCRA on a Django cache, same rules as GCRA_SCRIPT. Atomic within
+    this process only.
+    Returns (allowed, remaining, retry_after, reset) in seconds.
+    """
+    with _local_lock:
+        tat = max(store.get(key, now), now)
+        new_tat = tat + interval
+        allow_at = new_tat - burst * interval
+        if now < allow_at:
+            return False, 0, allow_at - now, tat - now
+
+        store.set(key, new_tat, timeout=new_tat - now)
+        return True, math.floor((now - allow_at) / interval + 1e-6), 0.0, new_tat - now
+
+
+def _redis_client():
+    """
+    Returns the raw Redis client for the throttle cache, or None when
+    that cache is not configured or not backed by django-redis.
+    """
+    alias = getattr(settings, "THROTTLE_CACHE", DEFAULT_THROTTLE_CACHE)
+    if alias not in settings.CACHES:
+        return None
+
+    client = getattr(caches[alias], "client", None)
+    return client.get_client(write=True) if hasattr(client, "get_client") else None
+
+
+def gcra_redis(client, key, interval, burst):
+    """
+    GCRA on Redis with one EVALSHA (EVAL on the first call per server).
+    Returns (allowed, remaining, retry_after, reset) in seconds.
+    """
+    args = (int(interval * MICROSECONDS), burst)
+    try:
+        allowed, remaining, retry_after, reset = client.evalsha(GCRA_SCRIPT_SHA, 1, key, *args)
+    except NoScriptError:
+        allowed, remaining, retry_after, reset = client.eval(GCRA_SCRIPT, 1, key, *args)
+    return bool(allowed), remaining, retry_after / MICROSECONDS, reset / MICROSECONDS
+
+
+def gcra(key, interval, burst, now):
+    """
+    Run GCRA for `key` on Redis, in-process while Redis is unavailable,
+    or on the default cache when no Redis cache is configured.
+    """
+    if not redis_health.should_try_primary():
+        return gcra_local(key, interval, burst, now)
+
+    client = _redis_client()
+    if client is None:
+        return gcra_local(key, interval, burst, now, store=cache)
+
+    try:
+        result = gcra_redis(client, key, interval, burst)
+    except FAILOVER_ERRORS as exc:
+        throttle_store_errors.inc()
+        if redis_health.mark_down():
+            logger.warning(
+                "Throttle store unavailable (%s); throttling in-process for %ss.",
+                exc, redis_health.retry_after
+            )
+        return gcra_local(key, interval, burst, now)
+
+    if not redis_health.healthy:
+        redis_health.mark_up()
+    return result
+
+
+def _remember(request, result):
+    """
+    Keep the most restrictive result on the request for the headers.
+    """
+    request = getattr(request, "_request", request)
+    current = getattr(request, "_ratelimit", None)
+    if current is None or (current.allowed, current.remaining) > (result.allowed, result.remaining):
+        request._ratelimit = result
+
+
+class GCRAThrottle(SimpleRateThrottle):
+    """
+    Drop-in replacement for SimpleRateThrottle using GCRA.
+
+    Subclasses set `scope` and/or `rate` and implement get_cache_key,
+    exactly as with DRF's throttles.
+    """
+    cache_format = "ratelimit:%(scope)s:%(ident)s"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval = self.duration / self.num_requests
+        allowed, remaining, retry_after, reset = gcra(self.key, interval, self.num_requests, self.timer())
+
+        self.result = RateLimit(allowed, self.num_requests, remaining, retry_after, reset, self.duration)
+        _remember(request, self.result)
+        throttle_decisions.inc(scope=self.scope or "default", result="allowed" if allowed else "limited")
+        return allowed
+
+    def wait(self):
+        return self.result.retry_after
+
+
+class UserRateThrottle(GCRAThrottle, DRFUserRateThrottle):
+    """
+    Per-user limit (per IP for anonymous requests), scope "user".
+    """
+
+
+class AnonRateThrottle(GCRAThrottle, DRFAnonRateThrottle):
+    """
+    Per-IP limit for anonymous requests, scope "anon".
+    """
+
 
 class DashboardThrottle(UserRateThrottle):
+    scope = "dashboard"
     rate = "60/min"
 
 
 class AlertsThrottle(UserRateThrottle):
+    scope = "alerts"
     rate = "30/min"
@@ -1,19 +1,24 @@
 from django.urls import path
-from .health import health_check
+from .health import health_check, metrics
 from .views import (
     DashboardSummaryView,
+    DashboardTimeseriesView,
     AlertsView,
     TransactionListCreateView,
+    TransactionImportView,
     BudgetListCreateView,
     GoalListCreateView,
 )
 
 urlpatterns = [
     path("health/", health_check),
+    path("metrics/", metrics),
 
     path("transactions/", TransactionListCreateView.as_view()),
+    path("transactions/import/", TransactionImportView.as_view()),
     path("budgets/", BudgetListCreateView.as_view()),
     path("goals/", GoalListCreateView.as_view()),
     path("dashboard/summary/", DashboardSummaryView.as_view()),
+    path("dashboard/timeseries/", DashboardTimeseriesView.as_view()),
     path("alerts/", AlertsView.as_view()),
 ]
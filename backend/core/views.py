@@ -8,38 +8,35 @@ This module contains:
 
 Performance Enhancements (Phase 4.1):
 - Redis caching for dashboard and alerts
-- Safe cache invalidation on transaction creation
+- Generation-counter cache invalidation on every write
+- ETag / If-None-Match on every read endpoint (core.conditional)
 - Graceful fallback if Redis is unavailable
 """
 
-from datetime import date
-
-from django.core.cache import cache
+from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from users.models import Profile
 from core.throttles import DashboardThrottle,AlertsThrottle
+from core.caching import bump_generation, get_dashboard, get_section, get_timeseries
+from core.conditional import alerts_part, conditional_get, today_part
 
 from .models import Transaction, Budget, Goal
+from .pagination import BudgetPagination, GoalPagination, TransactionPagination
 from .serializers import (
     TransactionSerializer,
+    TransactionFilterSerializer,
+    TransactionLayoutSerializer,
+    TransactionRows,
     BudgetSerializer,
+    DashboardPeriodSerializer,
+    TimeseriesQuerySerializer,
     GoalSerializer,
 )
 
-from core.services.dashboard import (
-    get_current_month,
-    get_monthly_transactions,
-    calculate_totals,
-    category_breakdown,
-    budget_usage,
-    goal_progress,
-)
-
-from core.services.insights import generate_insights
-from core.services.alerts import generate_rule_based_alerts
-from core.services.ml_adapter import fetch_ml_insights
+from core.services.imports import import_transactions
+from core.services.rollups import record_transaction
 
 
 # -------------------------------------------------------------------
@@ -50,32 +47,95 @@ class TransactionListCreateView(APIView):
     """
     Create and list transactions for the authenticated user.
 
+    Listing:
+    - Keyset-paginated on (date, id), newest first
+    - Filters: date_from, date_to, type, category, min_amount, max_amount
+    - Output: ?fields=a,b sparse fieldsets, ?layout=columnar
+      (see TransactionLayoutSerializer)
+
     Performance notes:
-    - On transaction creation, dashboard and alerts caches are invalidated
+    - Listing reads values_list rows (TransactionRows), not model instances
+    - Monthly rollups are updated in the same DB transaction as the insert
+    - On transaction creation the user's cache generation is bumped,
+      invalidating every dashboard month and alerts entry at once
     - This ensures users always see fresh insights after adding data
     """
     permission_classes = [IsAuthenticated]
 
+    @conditional_get()
     def get(self, request):
-        transactions = Transaction.objects.filter(user=request.user)
-        serializer = TransactionSerializer(transactions, many=True)
-        return Response(serializer.data)
+        filters = TransactionFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+
+        transactions = filters.filter_queryset(
+            Transaction.objects.filter(user=request.user)
+        )
+
+        layout = TransactionLayoutSerializer(data=request.query_params)
+        layout.is_valid(raise_exception=True)
+        rows = TransactionRows(layout.validated_data.get("fields"))
+
+        paginator = TransactionPagination()
+        page = paginator.paginate_queryset(rows.queryset(transactions), request)
+        return paginator.get_paginated_response(
+            rows.render(page, layout.validated_data["layout"])
+        )
 
     def post(self, request):
         serializer = TransactionSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(user=request.user)
+
+        with transaction.atomic():
+            tx = serializer.save(user=request.user)
+            record_transaction(tx)
 
         # ------------------------------
         # Cache invalidation (CRITICAL)
         # ------------------------------
-        month_key = date.today().strftime("%Y-%m")
-        cache.delete(f"dashboard:{request.user.id}:{month_key}")
-        cache.delete(f"alerts:{request.user.id}")
+        bump_generation(request.user.id, months=[tx.date])
 
         return Response(serializer.data, status=201)
 
 
+class TransactionImportView(APIView):
+    """
+    Bulk-import transactions from a CSV or JSON-lines upload.
+
+    Expects a multipart `file` field. CSV files need a header row with
+    type, category, amount, date and optional note columns; JSON-lines
+    files hold one object with the same keys per line.
+
+    Performance notes:
+    - The upload is parsed and validated as a stream
+    - Rows are inserted with batched bulk_create plus rollup deltas
+    - Caches are invalidated once for all committed batches
+      (import_transactions)
+
+    A file that cannot be read to the end (not UTF-8, broken CSV) gets
+    a 400 with `detail`; rows before that point stay imported.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "No file uploaded."}, status=400)
+
+        result = import_transactions(request.user, upload)
+
+        payload = {
+            "created": result["created"],
+            "failed": result["failed"],
+            "errors": result["errors"],
+        }
+        if result["file_error"]:
+            payload["detail"] = result["file_error"]
+            return Response(payload, status=400)
+
+        return Response(payload, status=201 if result["created"] else 400)
+
+
 # -------------------------------------------------------------------
 # BUDGETS API
 # -------------------------------------------------------------------
@@ -83,19 +143,27 @@ class TransactionListCreateView(APIView):
 class BudgetListCreateView(APIView):
     """
     Create and list budgets for the authenticated user.
+    Listing is keyset-paginated on (start_date, id), newest first.
     """
     permission_classes = [IsAuthenticated]
 
+    @conditional_get()
     def get(self, request):
         budgets = Budget.objects.filter(user=request.user)
-        serializer = BudgetSerializer(budgets, many=True)
-        return Response(serializer.data)
+
+        paginator = BudgetPagination()
+        page = paginator.paginate_queryset(budgets, request)
+        serializer = BudgetSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = BudgetSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save(user=request.user)
 
+        # Budgets feed dashboard usage and overuse alerts
+        bump_generation(request.user.id)
+
         return Response(serializer.data, status=201)
 
 
@@ -106,19 +174,27 @@ class BudgetListCreateView(APIView):
 class GoalListCreateView(APIView):
     """
     Create and list financial goals for the authenticated user.
+    Listing is keyset-paginated on (deadline, id), soonest first.
     """
     permission_classes = [IsAuthenticated]
 
+    @conditional_get()
     def get(self, request):
         goals = Goal.objects.filter(user=request.user)
-        serializer = GoalSerializer(goals, many=True)
-        return Response(serializer.data)
+
+        paginator = GoalPagination()
+        page = paginator.paginate_queryset(goals, request)
+        serializer = GoalSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def post(self, request):
         serializer = GoalSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save(user=request.user)
 
+        # Goals feed dashboard progress
+        bump_generation(request.user.id)
+
         return Response(serializer.data, status=201)
 
 
@@ -130,45 +206,54 @@ class DashboardSummaryView(APIView):
     """
     Returns summarized dashboard data for the authenticated user.
 
+    Query parameters (optional, see DashboardPeriodSerializer):
+    - month=YYYY-MM: a single month
+    - from=YYYY-MM&to=YYYY-MM: an inclusive month range
+    Defaults to the current month.
+
     Performance:
-    - Cached per user per month
-    - Cache TTL: 60 seconds
-    - Gracefully falls back to live computation if cache is unavailable
+    - Current month: cached per user (stale-while-revalidate, see
+      core.caching)
+    - Closed periods: long-lived snapshots, invalidated only by
+      transactions dated inside them or budget/goal/profile writes
     """
     permission_classes = [IsAuthenticated]
     throttle_classes = [DashboardThrottle]
 
+    @conditional_get(extra=today_part)
     def get(self, request):
-        user = request.user
-        month_key = date.today().strftime("%Y-%m")
-        cache_key = f"dashboard:{user.id}:{month_key}"
-
-        # Attempt cache read
-        cached_response = cache.get(cache_key)
-        if cached_response:
-            return Response(cached_response)
-        
-        profile, _ = Profile.objects.get_or_create(user=user)
-
-        # Cache miss → compute dashboard
-        transactions = get_monthly_transactions(user)
-
-        response = {
-            "period": {
-                "month": get_current_month(),
-                "currency": getattr(user.profile, "currency", "INR")
-            },
-            "totals": calculate_totals(transactions),
-            "categories": category_breakdown(transactions),
-            "budgets": budget_usage(user, transactions),
-            "goals": goal_progress(user),
-            "insights": generate_insights(user, transactions),
-        }
+        period = DashboardPeriodSerializer(data=request.query_params)
+        period.is_valid(raise_exception=True)
+
+        return Response(get_dashboard(
+            request.user,
+            period.validated_data["first"],
+            period.validated_data["last"]
+        ))
 
-        # Store in cache (short TTL)
-        cache.set(cache_key, response, timeout=60)
 
-        return Response(response)
+class DashboardTimeseriesView(APIView):
+    """
+    Returns income / expense / savings per bucket for trend charts.
+
+    Query parameters (see TimeseriesQuerySerializer):
+    - months: window length in months, including the current one
+    - granularity: month | week | day
+    - by_category: also split expenses by category
+
+    Performance:
+    - One grouped query per series (see core.services.timeseries)
+    - Cached per user generation
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [DashboardThrottle]
+
+    @conditional_get(extra=today_part)
+    def get(self, request):
+        query = TimeseriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        return Response(get_timeseries(request.user, **query.validated_data))
 
 
 # -------------------------------------------------------------------
@@ -184,28 +269,13 @@ class AlertsView(APIView):
     - Optional ML-generated insights (safe fallback)
 
     Performance:
-    - Cached per user
-    - Cache TTL: 30 seconds
+    - Cached per user (stale-while-revalidate, see core.caching)
+    - Fresh for ALERTS_SOFT_TTL, then served stale while a single
+      background refresh recomputes it
     """
     permission_classes = [IsAuthenticated]
     throttle_classes = [AlertsThrottle]
 
+    @conditional_get(extra=alerts_part)
     def get(self, request):
-        user = request.user
-        cache_key = f"alerts:{user.id}"
-
-        # Attempt cache read
-        cached_alerts = cache.get(cache_key)
-        if cached_alerts:
-            return Response({"alerts": cached_alerts})
-
-        # Cache miss → compute alerts
-        rule_alerts = generate_rule_based_alerts(user)
-        ml_alerts = fetch_ml_insights(user.id)
-
-        alerts = rule_alerts + ml_alerts
-
-        # Store in cache
-        cache.set(cache_key, alerts, timeout=30)
-
-        return Response({"alerts": alerts})
+        return Response({"alerts": get_section("alerts", request.user)})
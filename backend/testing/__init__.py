@@ -0,0 +1,4 @@
+"""
+Test-only helpers, kept outside the Django apps so runtime code never
+imports them.
+"""
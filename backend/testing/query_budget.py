@@ -0,0 +1,127 @@
+"""
+Query budgets for tests.
+
+Lives outside the apps: it patches CursorWrapper and must never be
+imported by runtime code.
+
+Purpose:
+- Fail a test when a block runs more queries, or fetches more rows,
+  than its declared budget, listing the offending SQL
+- Catch N+1 patterns by checking the same budget across dataset sizes
+
+Usage (in a django.test.TestCase using QueryBudgetMixin):
+
+    with self.assertQueryBudget(queries=4, rows=50):
+        self.client.get("/api/dashboard/summary/")
+
+    self.assertFlatQueryCount(seed, request, sizes=(1, 10, 50))
+"""
+
+from contextlib import contextmanager
+from unittest import mock
+
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryLog:
+    """
+    Queries executed and rows fetched while active.
+
+    Rows are counted by wrapping the cursor fetch methods, so they
+    reflect what the database actually returned to Python.
+    """
+
+    def __init__(self, using=connection):
+        self.using = using
+        self.queries = []  # [sql, rows fetched]
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def row_count(self):
+        return sum(rows for _, rows in self.queries)
+
+    def _execute(self, execute, sql, params, many, context):
+        entry = [sql, 0]
+        self.queries.append(entry)
+        context["cursor"]._query_budget_entry = entry
+        return execute(sql, params, many, context)
+
+    def _counting(self, name):
+        def fetch(cursor, *args):
+            result = getattr(cursor.cursor, name)(*args)
+            entry = getattr(cursor, "_query_budget_entry", None)
+            if entry is not None and result is not None:
+                entry[1] += 1 if name == "fetchone" else len(result)
+            return result
+        return fetch
+
+    @contextmanager
+    def capture(self):
+        with self.using.execute_wrapper(self._execute), \
+                mock.patch.object(CursorWrapper, "fetchone", self._counting("fetchone"), create=True), \
+                mock.patch.object(CursorWrapper, "fetchmany", self._counting("fetchmany"), create=True), \
+                mock.patch.object(CursorWrapper, "fetchall", self._counting("fetchall"), create=True):
+            yield self
+
+    def report(self):
+        return "\n".join(
+            f"{number}. [{rows} rows] {sql}"
+            for number, (sql, rows) in enumerate(self.queries, start=1)
+        )
+
+
+def check_budget(log, queries=None, rows=None, label=""):
+    """
+    Raise QueryBudgetExceeded if `log` is over budget.
+    """
+    problems = []
+    if queries is not None and log.query_count > queries:
+        problems.append(f"{log.query_count} queries (budget {queries})")
+    if rows is not None and log.row_count > rows:
+        problems.append(f"{log.row_count} rows fetched (budget {rows})")
+
+    if problems:
+        prefix = f"{label}: " if label else ""
+        raise QueryBudgetExceeded(f"{prefix}{', '.join(problems)}\n{log.report()}")
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin with query-budget assertions.
+    """
+
+    @contextmanager
+    def assertQueryBudget(self, queries=None, rows=None, label=""):
+        log = QueryLog()
+        with log.capture():
+            yield log
+        check_budget(log, queries, rows, label)
+
+    def assertFlatQueryCount(self, seed, request, sizes=(1, 10, 50), queries=None, rows=None, label=""):
+        """
+        For each size: seed(size), then run request() under the budget.
+        Fails if the query count differs between sizes, i.e. grows with data.
+        Returns {size: QueryLog}.
+        """
+        logs = {}
+        for size in sizes:
+            seed(size)
+            with self.assertQueryBudget(queries, rows, label=f"{label} size={size}".strip()) as log:
+                request()
+            logs[size] = log
+
+        counts = {size: log.query_count for size, log in logs.items()}
+        if len(set(counts.values())) > 1:
+            prefix = f"{label}: " if label else ""
+            raise QueryBudgetExceeded(
+                f"{prefix}query count grows with data {counts}\n{logs[max(sizes)].report()}"
+            )
+        return logs
@@ -10,6 +10,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
+from core.caching import bump_generation
+
 from .models import Profile
 from .serializers import ProfileSerializer
 
@@ -21,7 +23,11 @@ class ProfileView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        profile, _ = Profile.objects.get_or_create(user=request.user)
+        try:
+            # Usually attached by CachedJWTAuthentication: no query
+            profile = request.user.profile
+        except Profile.DoesNotExist:
+            profile, _ = Profile.objects.get_or_create(user=request.user)
         serializer = ProfileSerializer(profile)
         return Response(serializer.data)
 
@@ -30,4 +36,7 @@ class ProfileView(APIView):
         serializer = ProfileSerializer(profile, data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
+
+        # Currency is part of the cached dashboard payload
+        bump_generation(request.user.id)
         return Response(serializer.data)